@@ -1,9 +1,33 @@
-import matplotlib.pyplot as plt
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-import seaborn as sns
-from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Any
 from hybrid_timetable.utils.clashes import detect_clashes
+from hybrid_timetable.utils._jit import scatter_matrix, slot_counts
+
+# scipy is optional: sparse occupancy construction falls back to the dense
+# NumPy path when it is not installed.
+try:
+    from scipy import sparse as _scipy_sparse
+except ImportError:  # pragma: no cover - scipy is optional
+    _scipy_sparse = None
+
+# matplotlib/seaborn are imported lazily: seaborn alone costs ~500 ms and
+# pulls in pandas, which CLI consumers of the analysis functions never need.
+_plt = None
+_sns = None
+
+
+def _plotting():
+    global _plt, _sns
+    if _plt is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        _plt, _sns = plt, sns
+    return _plt, _sns
 
 def analyze_schedule(schedule: Dict[str, Any], rooms: List[Dict], slots_per_day: int, group_sizes: Optional[Dict[str, int]] = None) -> Dict[str, List]:
     """
@@ -20,108 +44,376 @@ def analyze_schedule(schedule: Dict[str, Any], rooms: List[Dict], slots_per_day:
     """
     clashes = detect_clashes(schedule, slots_per_day, rooms, group_sizes)
 
-    print("\n" + "="*50)
-    print("🎯 TIMETABLE CLASH ANALYSIS REPORT")
-    print("="*50)
+    # Buffer the report and emit it with a single write instead of one
+    # syscall (and potential flush) per print call.
+    buf = []
+    buf.append("\n" + "="*50)
+    buf.append("🎯 TIMETABLE CLASH ANALYSIS REPORT")
+    buf.append("="*50)
 
-    total_clashes = sum(len(clash_list) for clash_list in clashes.values())
+    # Cache list lengths once; total and "most critical" both derive from it.
+    clash_counts = {clash_type: len(clash_list) for clash_type, clash_list in clashes.items()}
+    total_clashes = sum(clash_counts.values())
 
     if total_clashes == 0:
-        print("✅ EXCELLENT! No clashes detected in the timetable.")
-        print("🎉 Schedule is conflict-free and ready for deployment.")
+        buf.append("✅ EXCELLENT! No clashes detected in the timetable.")
+        buf.append("🎉 Schedule is conflict-free and ready for deployment.")
     else:
-        print(f"⚠️  WARNING: {total_clashes} total clashes detected")
-        print("-" * 50)
+        buf.append(f"⚠️  WARNING: {total_clashes} total clashes detected")
+        buf.append("-" * 50)
 
     for clash_type, clash_list in clashes.items():
         if clash_list:
-            print(f"\n🔴 {clash_type.upper()} CLASHES: ({len(clash_list)} instances)")
-            print("-" * 40)
+            buf.append(f"\n🔴 {clash_type.upper()} CLASHES: ({clash_counts[clash_type]} instances)")
+            buf.append("-" * 40)
             for i, item in enumerate(clash_list, 1):
-                print(f"  {i:2d}. {item}")
+                buf.append(f"  {i:2d}. {item}")
         else:
-            print(f"\n✅ {clash_type.upper()}: No clashes detected")
+            buf.append(f"\n✅ {clash_type.upper()}: No clashes detected")
 
     # Summary statistics
     if total_clashes > 0:
-        print(f"\n📊 SUMMARY STATISTICS:")
-        print(f"   • Total clashes: {total_clashes}")
-        print(f"   • Clash types affected: {sum(1 for lst in clashes.values() if lst)}")
-        print(f"   • Most critical: {max(clashes.keys(), key=lambda k: len(clashes[k]))}")
+        buf.append(f"\n📊 SUMMARY STATISTICS:")
+        buf.append(f"   • Total clashes: {total_clashes}")
+        buf.append(f"   • Clash types affected: {sum(1 for n in clash_counts.values() if n)}")
+        buf.append(f"   • Most critical: {max(clash_counts, key=clash_counts.get)}")
 
-    print("="*50)
+    buf.append("="*50)
+    sys.stdout.write("\n".join(buf) + "\n")
     return clashes
 
-def generate_matrix(schedule: Dict[str, Any], entity_type: str, days: List[str], slots_per_day: int) -> Tuple[np.ndarray, List[str]]:
+@lru_cache(maxsize=64)
+def _build_entity_index(entities_key: frozenset) -> Tuple[Tuple[str, ...], Dict[str, int]]:
+    """Sorted entity tuple plus name->row index, memoized per entity set."""
+    entities = tuple(sorted(entities_key))
+    return entities, {e: i for i, e in enumerate(entities)}
+
+
+@lru_cache(maxsize=32)
+def _xlabels(days: Tuple[str, ...], slots_per_day: int) -> Tuple[str, ...]:
+    """Day/slot tick labels, memoized per (days, slots_per_day) layout."""
+    day_abbrevs = np.array([d[:3] for d in days])
+    slot_nums = np.arange(1, slots_per_day + 1).astype(str)
+    labels = np.char.add(np.repeat(day_abbrevs, slots_per_day),
+                         np.char.add("\n", np.tile(slot_nums, len(days))))
+    return tuple(labels.tolist())
+
+
+_matrix_cache: Dict[tuple, Tuple[np.ndarray, List[str]]] = {}
+_MATRIX_CACHE_MAX = 24
+
+
+def _schedule_hash(schedule: Dict[str, Any]) -> int:
+    """Cheap order-independent content hash over session placements."""
+    return sum(hash((sid, info["start"], info["length"], info.get("room")))
+               for sid, info in schedule.items())
+
+
+def build_entity_index(schedule: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Collect the sorted entity lists for all three entity types in one pass.
+
+    Computing this once per schedule lets repeated generate_matrix calls
+    skip their per-invocation set build and sort via the entities argument.
+
+    Args:
+        schedule: Dictionary of session assignments
+
+    Returns:
+        Dictionary mapping 'group'/'faculty'/'room' to sorted entity lists
+    """
+    groups, faculties, rooms = set(), set(), set()
+    for info in schedule.values():
+        meta = info["meta"]
+        groups.add(meta["group"])
+        faculties.add(meta["faculty"])
+        room = info.get("room")
+        if room:
+            rooms.add(room)
+    return {"group": sorted(groups), "faculty": sorted(faculties), "room": sorted(rooms)}
+
+
+@dataclass
+class ScheduleArrays:
+    """
+    Columnar (SoA) view of a schedule.
+
+    Hot paths repeatedly chase info["meta"][...] dict lookups per session;
+    converting once to index-encoded NumPy columns lets them run as array
+    kernels instead. Room index is -1 for sessions without an assigned room.
+    """
+    starts: np.ndarray
+    lengths: np.ndarray
+    groups: np.ndarray
+    faculties: np.ndarray
+    rooms: np.ndarray
+    group_labels: List[str]
+    faculty_labels: List[str]
+    room_labels: List[str]
+
+    @classmethod
+    def from_schedule(cls, schedule: Dict[str, Any]) -> "ScheduleArrays":
+        index = build_entity_index(schedule)
+        group_idx = {g: i for i, g in enumerate(index["group"])}
+        faculty_idx = {f: i for i, f in enumerate(index["faculty"])}
+        room_idx = {r: i for i, r in enumerate(index["room"])}
+
+        n = len(schedule)
+        starts = np.empty(n, dtype=np.int32)
+        lengths = np.empty(n, dtype=np.int32)
+        groups = np.empty(n, dtype=np.int32)
+        faculties = np.empty(n, dtype=np.int32)
+        rooms = np.empty(n, dtype=np.int32)
+        for i, info in enumerate(schedule.values()):
+            meta = info["meta"]
+            starts[i] = info["start"]
+            lengths[i] = info["length"]
+            groups[i] = group_idx[meta["group"]]
+            faculties[i] = faculty_idx[meta["faculty"]]
+            rooms[i] = room_idx.get(info.get("room"), -1)
+
+        return cls(starts, lengths, groups, faculties, rooms,
+                   index["group"], index["faculty"], index["room"])
+
+    def column(self, entity_type: str) -> np.ndarray:
+        return {"group": self.groups, "faculty": self.faculties, "room": self.rooms}[entity_type]
+
+    def labels(self, entity_type: str) -> List[str]:
+        return {"group": self.group_labels, "faculty": self.faculty_labels,
+                "room": self.room_labels}[entity_type]
+
+
+_arrays_cache: Dict[int, ScheduleArrays] = {}
+
+
+def _schedule_arrays(schedule: Dict[str, Any], sched_hash: Optional[int] = None) -> ScheduleArrays:
+    """Memoized ScheduleArrays per schedule content hash."""
+    if sched_hash is None:
+        sched_hash = _schedule_hash(schedule)
+    arrays = _arrays_cache.get(sched_hash)
+    if arrays is None:
+        if len(_arrays_cache) >= _MATRIX_CACHE_MAX:
+            _arrays_cache.clear()
+        arrays = ScheduleArrays.from_schedule(schedule)
+        _arrays_cache[sched_hash] = arrays
+    return arrays
+
+
+def generate_matrix(schedule: Dict[str, Any], entity_type: str, days: List[str], slots_per_day: int,
+                    entities: Optional[List[str]] = None) -> Tuple[np.ndarray, List[str]]:
     """
     Generic matrix generator for groups, faculties, or rooms.
 
+    Results are memoized on a content hash of the schedule, so repeated
+    visualizations of the same placements reuse the computed matrix;
+    call generate_matrix.cache_clear() to invalidate explicitly.
+
     Args:
         schedule: Dictionary of session assignments
         entity_type: Type of entity ('group', 'faculty', or 'room')
         days: List of day names
         slots_per_day: Number of slots per day
+        entities: Precomputed entity list (see build_entity_index); when
+            given, skips the per-call entity collection and sort
 
     Returns:
         Tuple of (matrix, entity_list)
     """
-    if entity_type == "room":
-        entities = sorted({info.get("room") for info in schedule.values() if info.get("room")})
+    sched_hash = _schedule_hash(schedule)
+    cache_key = (sched_hash, entity_type, tuple(days), slots_per_day,
+                 tuple(entities) if entities is not None else None)
+    cached = _matrix_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if entities is None:
+        arrays = _schedule_arrays(schedule, sched_hash)
+        result = _matrix_from_arrays(arrays, entity_type, days, slots_per_day)
     else:
-        entities = sorted({info["meta"][entity_type] for info in schedule.values()})
+        result = _generate_matrix_impl(schedule, entity_type, days, slots_per_day, entities)
+
+    if len(_matrix_cache) >= _MATRIX_CACHE_MAX:
+        _matrix_cache.clear()
+    _matrix_cache[cache_key] = result
+    return result
 
-    entity_idx = {e: i for i, e in enumerate(entities)}
+
+generate_matrix.cache_clear = _matrix_cache.clear
+
+
+def generate_matrices(schedule: Dict[str, Any], days: List[str], slots_per_day: int
+                      ) -> Tuple[np.ndarray, List[str], np.ndarray, List[str],
+                                 np.ndarray, List[str]]:
+    """
+    Build the group, faculty and room matrices in one fused pass.
+
+    The schedule is converted to SoA columns once (hashing it a single time
+    instead of once per entity type) and all three matrices are scattered
+    from the shared arrays, feeding the same per-type cache as
+    generate_matrix.
+
+    Returns:
+        (group_matrix, groups, faculty_matrix, faculties, room_matrix, rooms)
+    """
+    sched_hash = _schedule_hash(schedule)
+    arrays = _schedule_arrays(schedule, sched_hash)
+    out = []
+    for entity_type in ("group", "faculty", "room"):
+        cache_key = (sched_hash, entity_type, tuple(days), slots_per_day, None)
+        cached = _matrix_cache.get(cache_key)
+        if cached is None:
+            cached = _matrix_from_arrays(arrays, entity_type, days, slots_per_day)
+            if len(_matrix_cache) >= _MATRIX_CACHE_MAX:
+                _matrix_cache.clear()
+            _matrix_cache[cache_key] = cached
+        out.extend(cached)
+    return tuple(out)
+
+
+def _matrix_from_arrays(arrays: ScheduleArrays, entity_type: str, days: List[str],
+                        slots_per_day: int) -> Tuple[np.ndarray, List[str]]:
+    entities = arrays.labels(entity_type)
     total_slots = len(days) * slots_per_day
-    matrix = np.zeros((len(entities), total_slots), dtype=int)
+    # int32 is ample for occupancy counts and halves the cache traffic of
+    # the default int64; zero-init is still required for the += scatter.
+    matrix = np.zeros((len(entities), total_slots), dtype=np.int32)
+
+    rows = arrays.column(entity_type)
+    mask = rows >= 0
+    rows, starts, lengths = rows[mask], arrays.starts[mask], arrays.lengths[mask]
+    if rows.size == 0:
+        return matrix, entities
+
+    if scatter_matrix is not None:
+        # Numba kernel: compiled scatter loop, avoids the index expansion.
+        return scatter_matrix(rows, starts, lengths, total_slots, len(entities)), entities
+
+    if lengths.max() == 1:
+        # Common case: all sessions are single-slot, scatter directly.
+        cols = np.minimum(starts, total_slots - 1)
+    else:
+        # Expand each session into its occupied slots: repeat the start per
+        # slot and add per-session offsets 0..length-1.
+        rows = np.repeat(rows, lengths)
+        offsets = np.concatenate([np.arange(l) for l in lengths])
+        cols = np.minimum(np.repeat(starts, lengths) + offsets, total_slots - 1)
+
+    np.add.at(matrix, (rows, cols), 1)
+
+    return matrix, entities
 
-    for sid, info in schedule.items():
-        start = info["start"]
-        length = info["length"]
 
+def _generate_matrix_impl(schedule: Dict[str, Any], entity_type: str, days: List[str],
+                          slots_per_day: int, entities: Optional[List[str]] = None
+                          ) -> Tuple[np.ndarray, List[str]]:
+    if entities is None:
+        if entity_type == "room":
+            entity_set = frozenset(info.get("room") for info in schedule.values() if info.get("room"))
+        else:
+            entity_set = frozenset(info["meta"][entity_type] for info in schedule.values())
+        entities_t, entity_idx = _build_entity_index(entity_set)
+        entities = list(entities_t)
+    else:
+        entities = list(entities)
+        entity_idx = {e: i for i, e in enumerate(entities)}
+    total_slots = len(days) * slots_per_day
+    # int32 is ample for occupancy counts and halves the cache traffic of
+    # the default int64; zero-init is still required for the += scatter.
+    matrix = np.zeros((len(entities), total_slots), dtype=np.int32)
+
+    # Collect flat (entity, start, length) arrays in one pass, then scatter
+    # all occupancy increments with a single C-level np.add.at call instead
+    # of a per-session Python loop.
+    ents, starts, lengths = [], [], []
+    for info in schedule.values():
         if entity_type == "room":
             e = info.get("room")
         else:
             e = info["meta"].get(entity_type)
-
         if not e:
             continue
+        ents.append(entity_idx[e])
+        starts.append(info["start"])
+        lengths.append(info["length"])
+
+    if not ents:
+        return matrix, entities
+
+    starts = np.asarray(starts)
+    lengths = np.asarray(lengths)
+    rows = np.asarray(ents)
+
+    if scatter_matrix is not None:
+        # Numba kernel: compiled scatter loop, avoids the index expansion.
+        matrix = scatter_matrix(rows.astype(np.int32), starts.astype(np.int32),
+                                lengths.astype(np.int32), total_slots, len(entities))
+        return matrix, entities
+
+    if lengths.max() == 1:
+        # Common case: all sessions are single-slot, scatter directly.
+        cols = np.minimum(starts, total_slots - 1)
+    else:
+        # Expand each session into its occupied slots: repeat the start per
+        # slot and add per-session offsets 0..length-1.
+        rows = np.repeat(rows, lengths)
+        offsets = np.concatenate([np.arange(l) for l in lengths])
+        cols = np.minimum(np.repeat(starts, lengths) + offsets, total_slots - 1)
 
-        idx = entity_idx[e]
-        for offset in range(length):
-            slot = start + offset
-            if slot >= total_slots:
-                slot = total_slots - 1
-            matrix[idx, slot] += 1
+    np.add.at(matrix, (rows, cols), 1)
 
     return matrix, entities
 
 
-def plot_heatmap(matrix: np.ndarray, labels: List[str], days: List[str], slots_per_day: int,
-                 title: str = "Heatmap", save_path: Optional[str] = None, show: bool = True,
-                 cmap: str = "YlGnBu", figsize: Optional[Tuple[float, float]] = None) -> Optional[plt.Figure]:
+def generate_sparse_matrix(schedule: Dict[str, Any], entity_type: str, days: List[str],
+                           slots_per_day: int) -> Tuple[Any, List[str]]:
     """
-    Enhanced heatmap plotting function with professional visuals.
+    Sparse (COO) variant of generate_matrix for mostly-empty timetables.
+
+    Real schedules occupy a small fraction of the entity x slot grid, so a
+    COO matrix built straight from the SoA arrays is O(nnz) in memory;
+    densify with .toarray() only where a consumer truly needs the grid.
+    Falls back to the dense generate_matrix result when scipy is not
+    installed.
 
     Args:
-        matrix: 2D numpy array of occupancy data
-        labels: List of entity names (groups/faculties/rooms)
+        schedule: Dictionary of session assignments
+        entity_type: Type of entity ('group', 'faculty', or 'room')
         days: List of day names
         slots_per_day: Number of slots per day
-        title: Plot title
-        save_path: Path to save PNG file (optional)
-        show: Whether to display the plot
-        cmap: Color map for the heatmap
-        figsize: Figure size (auto-calculated if None)
 
     Returns:
-        Matplotlib figure object if return_fig is True, else None
+        Tuple of (matrix, entity_list); matrix is scipy.sparse.coo_matrix
+        when scipy is available, else a dense ndarray
     """
+    if _scipy_sparse is None:
+        return generate_matrix(schedule, entity_type, days, slots_per_day)
+
+    arrays = _schedule_arrays(schedule)
+    entities = arrays.labels(entity_type)
     total_slots = len(days) * slots_per_day
 
-    if figsize is None:
-        figsize = (max(total_slots * 0.4, 8), max(len(labels) * 0.4, 6))
+    rows = arrays.column(entity_type)
+    mask = rows >= 0
+    rows, starts, lengths = rows[mask], arrays.starts[mask], arrays.lengths[mask]
+
+    rows = np.repeat(rows, lengths)
+    offsets = np.concatenate([np.arange(l) for l in lengths]) if len(lengths) else np.array([], dtype=np.int32)
+    cols = np.minimum(np.repeat(starts, lengths) + offsets, total_slots - 1)
+
+    matrix = _scipy_sparse.coo_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(entities), total_slots))
+    matrix.sum_duplicates()
+    return matrix, entities
 
-    fig, ax = plt.subplots(figsize=figsize)
+
+def _plot_into_ax(fig: "plt.Figure", ax: "plt.Axes", matrix: np.ndarray, labels: List[str],
+                  days: List[str], slots_per_day: int, title: str = "Heatmap",
+                  cmap: str = "YlGnBu", max_annot_cells: int = 400) -> None:
+    """Render one entity heatmap into an existing axes (shared by plot_heatmap
+    and the batched visualize_all_entities figure)."""
+    _, sns = _plotting()
+    total_slots = len(days) * slots_per_day
 
     # Create custom colormap for better overlap visualization
     if "overlap" in title.lower() or "clash" in title.lower():
@@ -131,28 +423,73 @@ def plot_heatmap(matrix: np.ndarray, labels: List[str], days: List[str], slots_p
     elif "group" in title.lower():
         cmap = "Greens"
 
-    # Plot heatmap with enhanced styling
-    sns.heatmap(matrix, annot=True, fmt="d", cmap=cmap,
-                cbar_kws={'label': 'Sessions/Overlaps'},
-                linewidths=0.5, linecolor='lightgray',
-                square=False, ax=ax)
+    # Plot heatmap with enhanced styling. Seaborn with annot=True creates a
+    # Text artist per cell and stalls on large matrices, so big grids fall
+    # back to imshow with annotations only on occupied cells.
+    if matrix.size > 2500:
+        im = ax.imshow(matrix, cmap=cmap, aspect='auto')
+        fig.colorbar(im, ax=ax, label='Sessions/Overlaps')
+        if np.count_nonzero(matrix) <= max_annot_cells:
+            for i, j in np.argwhere(matrix > 0):
+                ax.text(j, i, int(matrix[i, j]), ha='center', va='center', fontsize=8)
+        tick_offset = 0.0
+    else:
+        sns.heatmap(matrix, annot=True, fmt="d", cmap=cmap,
+                    cbar_kws={'label': 'Sessions/Overlaps'},
+                    linewidths=0.5, linecolor='lightgray',
+                    square=False, ax=ax)
+        tick_offset = 0.5
 
     # Enhanced labels and title
     ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
     ax.set_xlabel("Time Slots", fontsize=12, labelpad=10)
     ax.set_ylabel("Entities", fontsize=12, labelpad=10)
 
-    # Custom x-axis labels with day/slot format
-    x_labels = []
-    for s in range(total_slots):
-        day_name = days[s // slots_per_day]
-        slot_num = s % slots_per_day + 1
-        x_labels.append(f"{day_name[:3]}\n{slot_num}")
+    # Custom x-axis labels with day/slot format (cached per layout)
+    x_labels = _xlabels(tuple(days), slots_per_day)
 
-    ax.set_xticks(np.arange(total_slots) + 0.5)
+    ax.set_xticks(np.arange(total_slots) + tick_offset)
     ax.set_xticklabels(x_labels, rotation=0, ha='center', fontsize=9)
+    ax.set_yticks(np.arange(len(labels)) + tick_offset)
     ax.set_yticklabels(labels, rotation=0, fontsize=10)
 
+
+def plot_heatmap(matrix: np.ndarray, labels: List[str], days: List[str], slots_per_day: int,
+                 title: str = "Heatmap", save_path: Optional[str] = None, show: bool = True,
+                 cmap: str = "YlGnBu", figsize: Optional[Tuple[float, float]] = None,
+                 max_annot_cells: int = 400) -> Optional["plt.Figure"]:
+    """
+    Enhanced heatmap plotting function with professional visuals.
+
+    Args:
+        matrix: 2D numpy array of occupancy data
+        labels: List of entity names (groups/faculties/rooms)
+        days: List of day names
+        slots_per_day: Number of slots per day
+        title: Plot title
+        save_path: Path to save PNG file (optional)
+        show: Whether to display the plot
+        cmap: Color map for the heatmap
+        figsize: Figure size (auto-calculated if None)
+
+    Returns:
+        Matplotlib figure object if return_fig is True, else None
+    """
+    if save_path is None and not show:
+        # Nothing would ever be displayed or saved; skip the render entirely.
+        return None
+
+    plt, _ = _plotting()
+    total_slots = len(days) * slots_per_day
+
+    if figsize is None:
+        figsize = (max(total_slots * 0.4, 8), max(len(labels) * 0.4, 6))
+
+    fig, ax = plt.subplots(figsize=figsize)
+
+    _plot_into_ax(fig, ax, matrix, labels, days, slots_per_day,
+                  title=title, cmap=cmap, max_annot_cells=max_annot_cells)
+
     # Add summary statistics as text
     max_overlaps = np.max(matrix)
     total_sessions = np.sum(matrix)
@@ -205,6 +542,60 @@ def visualize_entity_schedule(schedule: Dict[str, Any], entity_type: str, days:
     return matrix, entities
 
 
+def visualize_all_entities(schedule: Dict[str, Any], days: List[str], slots_per_day: int,
+                           save_path: Optional[str] = None, show: bool = True
+                           ) -> Dict[str, Tuple[np.ndarray, List[str]]]:
+    """
+    Render the group, faculty and room heatmaps into a single 3-row figure.
+
+    One figure / tight_layout / savefig instead of three keeps the
+    matplotlib overhead of a full report to a single render pass.
+
+    Args:
+        schedule: Dictionary of session assignments
+        days: List of day names
+        slots_per_day: Number of slots per day
+        save_path: Path to save the combined PNG file
+        show: Whether to display the plot
+
+    Returns:
+        Dictionary mapping entity type to its (matrix, entities) tuple
+    """
+    entity_types = ("group", "faculty", "room")
+    # The three matrix builds are independent and NumPy releases the GIL in
+    # the scatter kernels, so run them concurrently.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = {t: executor.submit(generate_matrix, schedule, t, days, slots_per_day)
+                   for t in entity_types}
+        results = {t: f.result() for t, f in futures.items()}
+
+    total_slots = len(days) * slots_per_day
+    n_rows = sum(max(len(entities), 1) for _, entities in results.values())
+    figsize = (max(total_slots * 0.4, 8), max(n_rows * 0.4, 9))
+
+    plt, _ = _plotting()
+    fig, axes = plt.subplots(3, 1, figsize=figsize)
+    for ax, entity_type in zip(axes, entity_types):
+        matrix, entities = results[entity_type]
+        title = f"{entity_type.capitalize()} Timetable Heatmap"
+        if np.max(matrix) > 1:
+            title += " (Red = Overlaps)"
+        _plot_into_ax(fig, ax, matrix, entities, days, slots_per_day, title=title)
+
+    plt.tight_layout()
+
+    if save_path:
+        fig.savefig(save_path, dpi=300, bbox_inches='tight')
+        print(f"💾 Combined heatmap saved to: {save_path}")
+
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
+
+    return results
+
+
 def generate_schedule_summary(schedule: Dict[str, Any], days: List[str], slots_per_day: int) -> Dict[str, Any]:
     """
     Generate comprehensive summary statistics for the schedule.
@@ -218,25 +609,27 @@ def generate_schedule_summary(schedule: Dict[str, Any], days: List[str], slots_p
     total_slots = len(days) * slots_per_day
     total_sessions = len(schedule)
 
-    # Calculate utilization metrics
-    groups = set(info["meta"]["group"] for info in schedule.values())
-    faculties = set(info["meta"]["faculty"] for info in schedule.values())
-    rooms = set(info.get("room") for info in schedule.values() if info.get("room"))
-
-    # Session length distribution
-    session_lengths = [info["length"] for info in schedule.values()]
-    avg_session_length = np.mean(session_lengths)
-    max_session_length = np.max(session_lengths)
-
-    # Time slot utilization
-    slot_utilization = np.zeros(total_slots)
-    for info in schedule.values():
-        start = info["start"]
-        length = info["length"]
-        for offset in range(length):
-            slot = start + offset
-            if slot < total_slots:
-                slot_utilization[slot] += 1
+    # Columnar view: entity labels and the start/length arrays come from one
+    # (memoized) pass over the schedule instead of separate traversals.
+    arrays = _schedule_arrays(schedule)
+    groups = arrays.group_labels
+    faculties = arrays.faculty_labels
+    rooms = arrays.room_labels
+
+    avg_session_length = np.mean(arrays.lengths)
+    max_session_length = np.max(arrays.lengths)
+
+    # Time slot utilization: expand sessions into flat slot indices and count
+    # them with one bincount instead of incrementing per slot in Python.
+    starts = arrays.starts
+    lengths = arrays.lengths
+    if slot_counts is not None:
+        slot_utilization = slot_counts(starts.astype(np.int32),
+                                       lengths.astype(np.int32), total_slots).astype(float)
+    else:
+        cols = np.repeat(starts, lengths) + np.concatenate([np.arange(l) for l in lengths])
+        cols = cols[cols < total_slots]
+        slot_utilization = np.bincount(cols, minlength=total_slots).astype(float)
 
     avg_slot_utilization = np.mean(slot_utilization)
     max_slot_utilization = np.max(slot_utilization)
@@ -261,24 +654,26 @@ def print_schedule_summary(schedule: Dict[str, Any], days: List[str], slots_per_
     """
     summary = generate_schedule_summary(schedule, days, slots_per_day)
 
-    print("\n" + "="*60)
-    print("📊 TIMETABLE SUMMARY STATISTICS")
-    print("="*60)
-    print(f"🎯 Total Sessions:     {summary['total_sessions']}")
-    print(f"📅 Total Time Slots:   {summary['total_slots']} ({len(days)} days × {slots_per_day} slots)")
-    print(f"👥 Groups:            {summary['groups_count']}")
-    print(f"👨‍🏫 Faculty Members:  {summary['faculties_count']}")
-    print(f"🏫 Rooms Used:        {summary['rooms_count']}")
-    print()
-    print("⏱️  Session Metrics:")
-    print(f"   • Avg Session Length: {summary['avg_session_length']:.2f} slots")
-    print(f"   • Max Session Length: {summary['max_session_length']} slots")
-    print()
-    print("📈 Utilization Metrics:")
-    print(f"   • Avg Slot Usage:     {summary['avg_slot_utilization']:.2f} sessions")
-    print(f"   • Peak Slot Usage:    {summary['max_slot_utilization']} sessions")
-    print(f"   • Overall Utilization: {summary['utilization_percentage']:.1f}%")
-    print("="*60)
+    buf = []
+    buf.append("\n" + "="*60)
+    buf.append("📊 TIMETABLE SUMMARY STATISTICS")
+    buf.append("="*60)
+    buf.append(f"🎯 Total Sessions:     {summary['total_sessions']}")
+    buf.append(f"📅 Total Time Slots:   {summary['total_slots']} ({len(days)} days × {slots_per_day} slots)")
+    buf.append(f"👥 Groups:            {summary['groups_count']}")
+    buf.append(f"👨‍🏫 Faculty Members:  {summary['faculties_count']}")
+    buf.append(f"🏫 Rooms Used:        {summary['rooms_count']}")
+    buf.append("")
+    buf.append("⏱️  Session Metrics:")
+    buf.append(f"   • Avg Session Length: {summary['avg_session_length']:.2f} slots")
+    buf.append(f"   • Max Session Length: {summary['max_session_length']} slots")
+    buf.append("")
+    buf.append("📈 Utilization Metrics:")
+    buf.append(f"   • Avg Slot Usage:     {summary['avg_slot_utilization']:.2f} sessions")
+    buf.append(f"   • Peak Slot Usage:    {summary['max_slot_utilization']} sessions")
+    buf.append(f"   • Overall Utilization: {summary['utilization_percentage']:.1f}%")
+    buf.append("="*60)
+    sys.stdout.write("\n".join(buf) + "\n")
 
 
 # Legacy functions for backward compatibility
@@ -305,6 +700,7 @@ def generate_room_matrix(schedule, days, slots_per_day):
 
 def plot_heatmap_legacy(matrix, labels, title="Heatmap"):
     """Legacy heatmap plotting function."""
+    plt, sns = _plotting()
     plt.figure(figsize=(12,6))
     sns.heatmap(matrix, annot=True, fmt="d", xticklabels=False, yticklabels=labels, cmap="coolwarm")
     plt.title(title)
@@ -6,13 +6,19 @@ Hybrid Timetable Generator (NEP-2020 aligned)
 """
 
 import json
-import matplotlib.pyplot as plt
+import sys
 from typing import List, Dict, Any, Optional
 from hybrid_timetable.timetable_generator import generate_timetable
 from hybrid_timetable.utils.clashes import detect_clashes
 from hybrid_timetable.utils.excel_export import export_schedule_to_excel
 
 
+def _heatmap_worker_init():
+    """Force the non-interactive Agg backend in heatmap worker processes."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
 def run_timetable_workflow(
     courses: List[Dict[str, Any]],
     rooms: List[Dict[str, Any]],
@@ -22,6 +28,7 @@ def run_timetable_workflow(
     output_dir: str = ".",
     excel_filename: str = "timetable.xlsx",
     show_plots: bool = False,
+    num_search_workers: int = 8,
     **kwargs
 ) -> Dict[str, Any]:
     """
@@ -39,6 +46,7 @@ def run_timetable_workflow(
         output_dir: Directory to save output files
         excel_filename: Name of the Excel output file
         show_plots: Whether to display plots interactively
+        num_search_workers: CP-SAT parallel search workers (capped at 16)
         **kwargs: Additional parameters for timetable generation
 
     Returns:
@@ -54,7 +62,7 @@ def run_timetable_workflow(
     """
     import os
     from analysis_visualization import (
-        generate_matrix, visualize_entity_schedule,
+        generate_matrices, visualize_entity_schedule,
         analyze_schedule, print_schedule_summary
     )
 
@@ -84,6 +92,7 @@ def run_timetable_workflow(
             "assign_rooms": True,
             "min_group_days": 3,
             "day_balance_fraction": 0.4,
+            "num_search_workers": num_search_workers,
             **kwargs  # Allow overriding defaults
         }
 
@@ -104,12 +113,8 @@ def run_timetable_workflow(
     print("-" * 50)
 
     try:
-        groups = list(set(info["meta"]["group"] for info in schedule.values()))
-        faculties = list(set(info["meta"]["faculty"] for info in schedule.values()))
-
-        group_matrix, groups = generate_matrix(schedule, "group", days, slots_per_day)
-        faculty_matrix, faculties = generate_matrix(schedule, "faculty", days, slots_per_day)
-        room_matrix, _ = generate_matrix(schedule, "room", days, slots_per_day)
+        (group_matrix, groups, faculty_matrix, faculties,
+         room_matrix, _) = generate_matrices(schedule, days, slots_per_day)
 
         print("Data matrices generated successfully!")
     except Exception as e:
@@ -148,42 +153,47 @@ def run_timetable_workflow(
     print("-" * 50)
 
     visualization_files = []
+    heatmap_jobs = [
+        ("group", "group_timetable_heatmap.png", "Group timetable"),
+        ("faculty", "faculty_workload_heatmap.png", "Faculty workload"),
+        ("room", "room_utilization_heatmap.png", "Room utilization"),
+    ]
 
-    # Group timetable heatmap
-    try:
-        matrix, entities = visualize_entity_schedule(
-            schedule, "group", days, slots_per_day,
-            save_path=os.path.join(output_dir, "group_timetable_heatmap.png"),
-            show=show_plots
-        )
-        visualization_files.append("group_timetable_heatmap.png")
-        print("Group timetable heatmap created")
-    except Exception as e:
-        print(f"Group heatmap generation failed: {e}")
-
-    # Faculty workload heatmap
-    try:
-        matrix, entities = visualize_entity_schedule(
-            schedule, "faculty", days, slots_per_day,
-            save_path=os.path.join(output_dir, "faculty_workload_heatmap.png"),
-            show=show_plots
-        )
-        visualization_files.append("faculty_workload_heatmap.png")
-        print("Faculty workload heatmap created")
-    except Exception as e:
-        print(f"Faculty heatmap generation failed: {e}")
-
-    # Room utilization heatmap
-    try:
-        matrix, entities = visualize_entity_schedule(
-            schedule, "room", days, slots_per_day,
-            save_path=os.path.join(output_dir, "room_utilization_heatmap.png"),
-            show=show_plots
-        )
-        visualization_files.append("room_utilization_heatmap.png")
-        print("Room utilization heatmap created")
-    except Exception as e:
-        print(f"Room heatmap generation failed: {e}")
+    if show_plots:
+        # Interactive display has to stay in this process.
+        for entity_type, filename, label in heatmap_jobs:
+            try:
+                visualize_entity_schedule(
+                    schedule, entity_type, days, slots_per_day,
+                    save_path=os.path.join(output_dir, filename),
+                    show=True
+                )
+                visualization_files.append(filename)
+                print(f"{label} heatmap created")
+            except Exception as e:
+                print(f"{label} heatmap generation failed: {e}")
+    else:
+        # The three renders are independent and savefig is CPU-heavy
+        # (rasterization + PNG compression), so fan them out to worker
+        # processes running the Agg backend.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=3,
+                                 initializer=_heatmap_worker_init) as executor:
+            futures = [
+                (executor.submit(
+                    visualize_entity_schedule, schedule, entity_type, days,
+                    slots_per_day,
+                    save_path=os.path.join(output_dir, filename), show=False),
+                 filename, label)
+                for entity_type, filename, label in heatmap_jobs
+            ]
+            for future, filename, label in futures:
+                try:
+                    future.result()
+                    visualization_files.append(filename)
+                    print(f"{label} heatmap created")
+                except Exception as e:
+                    print(f"{label} heatmap generation failed: {e}")
 
     # Step 6: Detailed clash analysis report
     print("\STEP 6: Generating Detailed Clash Report")
@@ -319,13 +329,10 @@ if __name__ == "__main__":
         exit(1)
 
     # Generate matrices for visualization
-    from analysis_visualization import (generate_matrix, visualize_entity_schedule, analyze_schedule, print_schedule_summary)
+    from analysis_visualization import (generate_matrices, visualize_entity_schedule, analyze_schedule, print_schedule_summary)
 
-    groups = list(set(info["meta"]["group"] for info in schedule.values()))
-    faculties = list(set(info["meta"]["faculty"] for info in schedule.values()))
-    group_matrix, groups = generate_matrix(schedule, "group", days, slots_per_day)
-    faculty_matrix, faculties = generate_matrix(schedule, "faculty", days, slots_per_day)
-    room_matrix, _ = generate_matrix(schedule, "room", days, slots_per_day)
+    (group_matrix, groups, faculty_matrix, faculties,
+     room_matrix, _) = generate_matrices(schedule, days, slots_per_day)
 
     clashes = detect_clashes(schedule, slots_per_day, rooms, group_sizes=group_sizes)
 
@@ -387,4 +394,7 @@ if __name__ == "__main__":
     else:
         print("No clashes found")
 
-    print(json.dumps(schedule, indent=2))
+    # Stream instead of materializing the full pretty-printed string; the
+    # default hook serializes the slotted Session metadata records.
+    json.dump(schedule, sys.stdout, indent=2, default=lambda o: o.as_dict())
+    sys.stdout.write("\n")
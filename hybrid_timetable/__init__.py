@@ -7,12 +7,14 @@ with Genetic Algorithms to create optimal academic schedules.
 
 from .timetable_generator import generate_timetable
 from .utils.clashes import detect_clashes
-from .utils.excel_export import export_schedule_to_excel
+from .utils.excel_export import build_workbook, export_schedule_to_excel, save_workbook
 from .room_assignment import greedy_room_assignment
 
 __all__ = [
     "generate_timetable",
     "detect_clashes",
+    "build_workbook",
+    "save_workbook",
     "export_schedule_to_excel",
     "greedy_room_assignment"
 ]
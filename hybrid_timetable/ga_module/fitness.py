@@ -1,176 +1,295 @@
-import math
-from collections import defaultdict
+import numpy as np
+
 from ..utils.helpers import build_weekly_block_indices
+from ..utils._jit import clash_penalty
+
+# SoA cache: the sessions list is invariant for a whole GA run, so the
+# integer columns and the slot-expansion index are built once and reused by
+# every fitness evaluation. Keyed on id() with the sessions object kept
+# alive in the entry so the id cannot be recycled.
+_soa_cache = {}
+_SOA_CACHE_MAX = 4
+
+
+def _session_arrays(sessions):
+    """Pre-encoded integer SoA columns for a sessions list (memoized)."""
+    key = id(sessions)
+    cached = _soa_cache.get(key)
+    if cached is not None and cached[0] is sessions:
+        return cached[1]
+
+    n = len(sessions)
+    faculty_labels = sorted({s['faculty'] for s in sessions})
+    group_labels = sorted({s['group'] for s in sessions})
+    faculty_idx = {f: i for i, f in enumerate(faculty_labels)}
+    group_idx = {g: i for i, g in enumerate(group_labels)}
+
+    lengths = np.fromiter((s['length'] for s in sessions), dtype=np.int64, count=n)
+    fac_ids = np.fromiter((faculty_idx[s['faculty']] for s in sessions), dtype=np.int64, count=n)
+    grp_ids = np.fromiter((group_idx[s['group']] for s in sessions), dtype=np.int64, count=n)
+
+    # Expansion index: session i contributes lengths[i] consecutive slots.
+    sess_exp = np.repeat(np.arange(n), lengths)
+    offsets = (np.concatenate([np.arange(l) for l in lengths])
+               if n else np.zeros(0, dtype=np.int64))
+
+    arrays = {
+        "lengths": lengths,
+        "fac_ids": fac_ids,
+        "grp_ids": grp_ids,
+        "faculty_labels": faculty_labels,
+        "group_labels": group_labels,
+        "n_fac": len(faculty_labels),
+        "n_grp": len(group_labels),
+        "sess_exp": sess_exp,
+        "offsets": offsets,
+        "max_length": int(lengths.max()) if n else 1,
+    }
+    if len(_soa_cache) >= _SOA_CACHE_MAX:
+        _soa_cache.clear()
+    _soa_cache[key] = (sessions, arrays)
+    return arrays
+
+
+def _overlap_penalty(entity_exp, slot_exp, width):
+    """200 per extra occupant of the same (entity, slot) cell."""
+    counts = np.bincount(entity_exp * width + slot_exp)
+    over = counts[counts > 1]
+    return 200 * int((over - 1).sum())
+
 
 def ga_fitness(ind, sessions, rooms, days, slots_per_day,
                max_classes_per_day=5, max_consec_slots=3, max_daily_hours_per_faculty=5,
                project_block_positions=None, is_project_func=None,
                group_sizes=None, day_balance_fraction=0.4,
-               elective_groups=None, faculty_prefs=None):
+               elective_groups=None, faculty_prefs=None,
+               project_slots=None, is_project_arr=None, is_elective_arr=None):
     """
     Fitness with NEP-2020 soft constraints:
     - heavy penalties for clashes and room capacity violations
     - penalties for day imbalance, gaps, consecutive over-limit, faculty daily overload, workload variance
     - added elective balancing and faculty load preferences
+
+    The genome is decoded into NumPy arrays once per call and every penalty
+    term runs as a vectorized kernel instead of per-session dict
+    accumulation; the static session columns come from a memoized SoA cache.
     """
-    def decode(g): return divmod(g, 100)
-
-    assign = {}
-    for idx, g in enumerate(ind):
-        start, room_idx = decode(g)
-        # clamp start to valid range (robustness)
-        total_slots = len(days) * slots_per_day
-        start = max(0, min(start, total_slots - 1))
-        room_idx = max(0, min(room_idx, len(rooms)-1))
-        assign[sessions[idx]['sess_id']] = (start, room_idx, sessions[idx]['length'], sessions[idx])
-
-    faculty_occ, group_occ, room_occ = defaultdict(list), defaultdict(list), defaultdict(list)
-    hard_penalty, soft_penalty = 0, 0
-
-    # Hard: no overlaps
-    for sid, (start, room_idx, length, meta) in assign.items():
-        for off in range(length):
-            slot = start + off
-            faculty_occ[(meta['faculty'], slot)].append(sid)
-            group_occ[(meta['group'], slot)].append(sid)
-            room_name = rooms[room_idx]["name"] if isinstance(room_idx, int) else room_idx
-            room_occ[(room_name, slot)].append(sid)
-
-    for occ in (faculty_occ, group_occ, room_occ):
-        for k, v in occ.items():
-            if len(v) > 1:
-                hard_penalty += 200 * (len(v) - 1)
+    arrs = _session_arrays(sessions)
+    n = len(sessions)
+    total_slots = len(days) * slots_per_day
+    n_days = len(days)
+
+    g = np.asarray(ind, dtype=np.int64).reshape(-1, 2)
+    starts = np.clip(g[:, 0], 0, total_slots - 1)
+    room_ids = np.clip(g[:, 1], 0, len(rooms) - 1)
+
+    lengths = arrs["lengths"]
+    sess_exp = arrs["sess_exp"]
+    offsets = arrs["offsets"]
+
+    # Per-occupied-slot expansion.  Slots may run past the grid end, exactly
+    # like the unclipped start+offset keys in the old dict accumulators, so
+    # the key width leaves headroom for the longest session.
+    slot_exp = starts[sess_exp] + offsets
+    width = total_slots + arrs["max_length"]
+
+    hard_penalty, soft_penalty = 0, 0.0
+
+    # Hard: no overlaps (fused JIT kernel when numba is available)
+    if clash_penalty is not None:
+        hard_penalty += int(clash_penalty(
+            arrs["fac_ids"][sess_exp], arrs["grp_ids"][sess_exp],
+            room_ids[sess_exp], slot_exp,
+            arrs["n_fac"], arrs["n_grp"], len(rooms), width))
+    else:
+        hard_penalty += _overlap_penalty(arrs["fac_ids"][sess_exp], slot_exp, width)
+        hard_penalty += _overlap_penalty(arrs["grp_ids"][sess_exp], slot_exp, width)
+        hard_penalty += _overlap_penalty(room_ids[sess_exp], slot_exp, width)
+
+    # Per-(group, day) occupancy drives every per-day group metric below.
+    # A day's local slots fit comfortably in 64 bits, so each (group, day)
+    # cell is a single uint64 bitmask: distinct-slot counts are popcounts,
+    # gaps and consecutive runs come from shift-and-mask tricks. The dense
+    # boolean matrix remains as a fallback for absurdly wide days.
+    day_exp = starts[sess_exp] // slots_per_day
+    local_exp = starts[sess_exp] % slots_per_day + offsets
+    local_width = slots_per_day + arrs["max_length"]
+    gd_keys = arrs["grp_ids"][sess_exp] * n_days + day_exp
+    use_swar = local_width <= 64
+    if use_swar:
+        gd_bits = np.zeros(arrs["n_grp"] * n_days, dtype=np.uint64)
+        np.bitwise_or.at(gd_bits, gd_keys,
+                         np.uint64(1) << local_exp.astype(np.uint64))
+        day_counts = (np.bitwise_count(gd_bits).astype(np.int64)
+                      .reshape(arrs["n_grp"], n_days))
+    else:
+        gd_mask = np.zeros((arrs["n_grp"] * n_days, local_width), dtype=bool)
+        gd_mask[gd_keys, local_exp] = True
+        day_counts = gd_mask.sum(axis=1).reshape(arrs["n_grp"], n_days)
 
     # Hard: max classes/day per group
-    group_daily_slots = defaultdict(lambda: defaultdict(list))
-    for sid, (start, _, length, meta) in assign.items():
-        group = meta['group']
-        day = start // slots_per_day
-        for off in range(length):
-            group_daily_slots[group][day].append((start % slots_per_day) + off)
-
-    for group, dayslots in group_daily_slots.items():
-        for day, slots in dayslots.items():
-            if len(set(slots)) > max_classes_per_day:
-                hard_penalty += 300 * (len(set(slots)) - max_classes_per_day)
-
-    # Hard-ish: room capacity violations (if group_sizes present)
+    over = day_counts - max_classes_per_day
+    hard_penalty += 300 * int(over[over > 0].sum())
+
+    # Hard-ish: room capacity violations (if group_sizes present). The
+    # per-session size and per-room capacity tables are run constants, so
+    # they are memoized on the SoA entry (keyed by the source object ids,
+    # with a reference held so the ids stay valid).
     if group_sizes:
-        for sid, (start, room_idx, length, meta) in assign.items():
-            room = rooms[room_idx]
-            size = group_sizes.get(meta['group'], 0)
-            if size > room['capacity']:
-                # big penalty (hard-ish)
-                hard_penalty += 500 + 10 * (size - room['capacity'])
+        cap_key = ("capacity", id(rooms), id(group_sizes))
+        cached = arrs.get(cap_key)
+        if cached is None:
+            cached = arrs[cap_key] = (
+                rooms, group_sizes,
+                np.array([group_sizes.get(lbl, 0)
+                          for lbl in arrs["group_labels"]])[arrs["grp_ids"]],
+                np.array([r['capacity'] for r in rooms]))
+        _, _, sizes, room_caps = cached
+        caps = room_caps[room_ids]
+        short = sizes - caps
+        short = short[short > 0]
+        hard_penalty += int((500 + 10 * short).sum())
+
+    # Catastrophically infeasible individuals are discarded by selection
+    # regardless of their soft score; skip the soft terms entirely. The
+    # large offset keeps ordering among infeasibles meaningful.
+    if hard_penalty > 5000:
+        return (hard_penalty + 1e6,)
 
     # Soft: workload balance (faculty variance)
-    faculty_hours = defaultdict(int)
-    for sid, (start, _, length, meta) in assign.items():
-        faculty_hours[meta['faculty']] += length
-    vals = list(faculty_hours.values())
-    if vals:
-        avg = sum(vals) / len(vals)
-        variance = sum((x - avg) ** 2 for x in vals) / len(vals)
-        soft_penalty += variance
-
-    # Soft: student gaps (minimize idle slots)
-    for group, dayslots in group_daily_slots.items():
-        for day, slots in dayslots.items():
-            slots_sorted = sorted(set(slots))
-            for i in range(len(slots_sorted) - 1):
-                if slots_sorted[i+1] > slots_sorted[i] + 1:
-                    soft_penalty += 1
-
-    # Soft: limit consecutive sessions (heavier penalty for >3)
-    for group, dayslots in group_daily_slots.items():
-        for day, slots in dayslots.items():
-            slots_sorted = sorted(set(slots))
-            consec = 1
-            for i in range(1, len(slots_sorted)):
-                if slots_sorted[i] == slots_sorted[i-1] + 1:
-                    consec += 1
-                    if consec > max_consec_slots:
-                        soft_penalty += 10 * (consec - max_consec_slots)  # increased weight
-                else:
-                    consec = 1
+    faculty_hours = np.bincount(arrs["fac_ids"], weights=lengths, minlength=arrs["n_fac"])
+    if faculty_hours.size:
+        soft_penalty += float(faculty_hours.var())
+
+    # Soft: student gaps + consecutive over-limit
+    if use_swar:
+        # m & ~(m << 1) isolates the lowest bit of each occupied run, so
+        # gaps = runs - nonempty masks. Iterating m &= m << 1 shortens
+        # every run by one slot per step; summing popcounts from step
+        # max_consec onward telescopes to 10 * tri(run_len - max_consec).
+        run_starts = gd_bits & ~(gd_bits << np.uint64(1))
+        n_runs = int(np.bitwise_count(run_starts).sum())
+        soft_penalty += n_runs - int(np.count_nonzero(gd_bits))
+        m = gd_bits.copy()
+        step = 0
+        consec_pen = 0
+        while m.any():
+            if step >= max_consec_slots:
+                consec_pen += int(np.bitwise_count(m).sum())
+            m &= m << np.uint64(1)
+            step += 1
+        soft_penalty += 10 * consec_pen
+    else:
+        # run-length encode the rows; padding a False column on each side
+        # keeps runs from bleeding across (group, day) rows when flattened
+        padded = np.zeros((gd_mask.shape[0], local_width + 2), dtype=bool)
+        padded[:, 1:-1] = gd_mask
+        flat = padded.ravel()
+        edges = np.flatnonzero(flat[1:] != flat[:-1])
+        run_lens = edges[1::2] - edges[0::2]
+        if run_lens.size:
+            rows_with_any = int((day_counts > 0).sum())
+            soft_penalty += int(run_lens.size - rows_with_any)
+            excess = run_lens - max_consec_slots
+            excess = excess[excess > 0]
+            soft_penalty += int((10 * excess * (excess + 1) // 2).sum())
 
     # Soft: faculty daily overload
-    faculty_daily = defaultdict(lambda: defaultdict(int))
-    for sid, (start, _, length, meta) in assign.items():
-        day = start // slots_per_day
-        faculty_daily[meta['faculty']][day] += length
-    for f, days_load in faculty_daily.items():
-        for d, load in days_load.items():
-            if load > max_daily_hours_per_faculty:
-                soft_penalty += 10 * (load - max_daily_hours_per_faculty)
-
-    # Soft: daily load balance for groups
-    for group, dayslots in group_daily_slots.items():
-        loads = [len(set(slots)) for slots in dayslots.values()]
-        if loads:
-            avg = sum(loads) / len(loads)
-            variance = sum((x - avg)**2 for x in loads) / len(loads)
-            soft_penalty += variance * 5
+    fac_day_load = np.bincount(arrs["fac_ids"][sess_exp] * n_days + day_exp,
+                               minlength=arrs["n_fac"] * n_days)
+    overload = fac_day_load - max_daily_hours_per_faculty
+    soft_penalty += 10 * int(overload[overload > 0].sum())
+
+    # Soft: daily load balance for groups (variance of per-day distinct
+    # counts over the days each group is actually scheduled)
+    active_days = (day_counts > 0).sum(axis=1).astype(float)
+    safe_days = np.maximum(active_days, 1)
+    grp_sum = day_counts.sum(axis=1)
+    grp_sumsq = (day_counts.astype(float) ** 2).sum(axis=1)
+    variance = grp_sumsq / safe_days - (grp_sum / safe_days) ** 2
+    soft_penalty += 5 * float(variance[active_days > 0].sum())
 
     # Soft: day-balance & clustering penalty
-    for group, dayslots in group_daily_slots.items():
-        total_sessions = sum(len(set(slots)) for slots in dayslots.values())
-        if total_sessions <= 0:
-            continue
-        for d, slots in dayslots.items():
-            cnt = len(set(slots))
-            # Existing day fraction penalty
-            if cnt > math.ceil(day_balance_fraction * total_sessions):
-                soft_penalty += 100 * (cnt - math.ceil(day_balance_fraction * total_sessions))  # stronger
-        # Penalize gaps/clustering more heavily
-        all_slots = sorted([slot for slots in dayslots.values() for slot in slots])
-        for i in range(1, len(all_slots)):
-            gap = all_slots[i] - all_slots[i-1] - 1
-            soft_penalty += 2 * gap  # heavier penalty for idle slots
-
-    # Soft: elective balancing - spread electives across days and avoid overlaps
+    thresholds = np.ceil(day_balance_fraction * grp_sum)[:, None]
+    over_day = day_counts - thresholds
+    over_day = over_day[(day_counts > 0) & (over_day > 0)]
+    soft_penalty += 100 * float(over_day.sum())
+
+    # Clustering: for each group's sorted multiset of local slots (across
+    # days, duplicates kept) the summed adjacent gaps telescope to
+    # (max - min) - (count - 1).
+    grp_exp = arrs["grp_ids"][sess_exp]
+    slot_min = np.full(arrs["n_grp"], np.iinfo(np.int64).max)
+    slot_max = np.full(arrs["n_grp"], np.iinfo(np.int64).min)
+    np.minimum.at(slot_min, grp_exp, local_exp)
+    np.maximum.at(slot_max, grp_exp, local_exp)
+    grp_slot_count = np.bincount(grp_exp, minlength=arrs["n_grp"])
+    has = grp_slot_count > 0
+    soft_penalty += 2 * float(
+        (slot_max[has] - slot_min[has] - (grp_slot_count[has] - 1)).sum())
+
+    # Soft: elective balancing - spread electives across days and avoid
+    # overlaps. The elective flags/group indices are genome-invariant, so
+    # they are memoized on the SoA cache entry keyed by the group tuple.
     if elective_groups:
-        elective_slots = defaultdict(lambda: defaultdict(int))  # group -> slot -> count
-        elective_days = defaultdict(lambda: defaultdict(int))  # group -> day -> count
-        for sid, (start, _, length, meta) in assign.items():
-            if meta['group'] in elective_groups and 'elective' in meta['name'].lower():
-                day = start // slots_per_day
-                for off in range(length):
-                    slot = start + off
-                    elective_slots[meta['group']][slot] += 1
-                elective_days[meta['group']][day] += length
-        # Penalize if electives of different groups overlap too much
-        for slot in range(len(days) * slots_per_day):
-            counts = [elective_slots[g].get(slot, 0) for g in elective_groups]
-            if sum(counts) > 1:
-                soft_penalty += 50 * (sum(counts) - 1)
-        # Penalize if electives are concentrated on same days
-        for day in range(len(days)):
-            day_counts = [elective_days[g].get(day, 0) for g in elective_groups]
-            if sum(day_counts) > 0 and max(day_counts) > sum(day_counts) / len(elective_groups):
-                soft_penalty += 30 * (max(day_counts) - sum(day_counts) / len(elective_groups))
+        eg_key = ("elective", tuple(elective_groups))
+        cached = arrs.get(eg_key)
+        if cached is None:
+            eg_idx = {name: i for i, name in enumerate(elective_groups)}
+            in_eg = np.array([s['group'] in eg_idx for s in sessions])
+            if is_elective_arr is not None:
+                is_elec = in_eg & np.asarray(is_elective_arr, dtype=bool)
+            else:
+                is_elec = in_eg & np.array(['elective' in s['name'].lower()
+                                            for s in sessions])
+            egrp = np.fromiter((eg_idx.get(s['group'], 0) for s in sessions),
+                               dtype=np.int64, count=n)
+            cached = arrs[eg_key] = (is_elec, egrp, len(elective_groups))
+        is_elec, egrp, n_eg = cached
+        slot_counts = np.zeros(total_slots, dtype=np.int64)
+        elec_days = np.zeros((n_eg, n_days), dtype=np.int64)
+        if is_elec.any():
+            e_slots = slot_exp[is_elec[sess_exp]]
+            in_grid = e_slots < total_slots
+            np.add.at(slot_counts, e_slots[in_grid], 1)
+            np.add.at(elec_days,
+                      (egrp[is_elec], starts[is_elec] // slots_per_day),
+                      lengths[is_elec])
+        soft_penalty += 50 * int(np.clip(slot_counts - 1, 0, None).sum())
+        day_max = elec_days.max(axis=0)
+        day_sum = elec_days.sum(axis=0)
+        day_mean = day_sum / n_eg
+        conc = np.where((day_sum > 0) & (day_max > day_mean), day_max - day_mean, 0.0)
+        soft_penalty += 30 * float(conc.sum())
 
     # Soft: faculty load preferences (morning/afternoon)
     if faculty_prefs:
-        morning_slots = set(range(slots_per_day // 2))
-        afternoon_slots = set(range(slots_per_day // 2, slots_per_day))
-        for sid, (start, _, length, meta) in assign.items():
-            pref = faculty_prefs.get(meta['faculty'])
-            if pref:
-                day_slot = start % slots_per_day
-                if pref == 'morning' and day_slot not in morning_slots:
-                    soft_penalty += 20
-                elif pref == 'afternoon' and day_slot not in afternoon_slots:
-                    soft_penalty += 20
-
-    # Soft: project block alignment penalty (existing)
-    if project_block_positions and is_project_func:
-        project_slots = build_weekly_block_indices(days, slots_per_day, project_block_positions)
-        for sid, (start, _, length, meta) in assign.items():
-            if not is_project_func(meta):
-                for off in range(length):
-                    if (start + off) in project_slots:
-                        soft_penalty += 5
+        pref_key = ("prefs", id(faculty_prefs))
+        cached = arrs.get(pref_key)
+        if cached is None:
+            cached = arrs[pref_key] = (
+                faculty_prefs,
+                np.array([1 if faculty_prefs.get(f) == 'morning' else
+                          2 if faculty_prefs.get(f) == 'afternoon' else 0
+                          for f in arrs["faculty_labels"]])[arrs["fac_ids"]])
+        pref_codes = cached[1]
+        day_slot = starts % slots_per_day
+        morning = day_slot < slots_per_day // 2
+        violated = ((pref_codes == 1) & ~morning) | ((pref_codes == 2) & morning)
+        soft_penalty += 20 * int(violated.sum())
+
+    # Soft: project block alignment penalty (existing). Callers normally
+    # hand in the precomputed project_slots and is_project_arr arrays;
+    # rebuilding from positions/callable is kept for direct invocations.
+    if ((project_slots is not None or project_block_positions)
+            and (is_project_arr is not None or is_project_func)):
+        if project_slots is None:
+            project_slots = np.asarray(
+                build_weekly_block_indices(days, slots_per_day, project_block_positions))
+        if is_project_arr is None:
+            is_project_arr = np.array([bool(is_project_func(s)) for s in sessions])
+        mask = ~np.asarray(is_project_arr, dtype=bool)[sess_exp]
+        soft_penalty += 5 * int(np.isin(slot_exp[mask], project_slots).sum())
 
     # total fitness: heavy weight on hard_penalty
     return (hard_penalty + 0.05 * soft_penalty,)
@@ -1,8 +1,46 @@
+import array
 import random
+from collections import OrderedDict
+from multiprocessing import Pool
 from deap import base, creator, tools
 import numpy as np
 from functools import partial
 from .fitness import ga_fitness
+from ..utils.helpers import build_weekly_block_indices
+
+
+class CachedFitness:
+    """LRU-memoized fitness wrapper keyed on the raw genome bytes.
+
+    Tournament selection copies survivors unchanged between generations, so
+    identical genomes recur often; caching skips their re-evaluation. The
+    cache is per-process and is dropped on pickling, so each pool worker
+    builds its own.
+    """
+
+    def __init__(self, func, maxsize=10000):
+        self.func = func
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def __call__(self, ind):
+        key = ind.tobytes() if isinstance(ind, array.array) else bytes(array.array('i', ind))
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+        val = self.func(ind)
+        self._cache[key] = val
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return val
+
+    def __getstate__(self):
+        return {"func": self.func, "maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state["func"], state["maxsize"])
+
 
 def setup_ga(sessions, rooms, days, slots_per_day,
              elective_slots_per_day=None, is_elective_func=None,
@@ -10,12 +48,11 @@ def setup_ga(sessions, rooms, days, slots_per_day,
              faculty_prefs=None, use_parallel=True):
     total_slots = len(days) * slots_per_day
     creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-    creator.create("Individual", list, fitness=creator.FitnessMin)
+    # array.array('i') genome: unboxed 4-byte ints instead of PyObject lists,
+    # which shrinks populations and speeds slicing during crossover.
+    creator.create("Individual", array.array, typecode='i', fitness=creator.FitnessMin)
     toolbox = base.Toolbox()
 
-    def encode(start, room): return start * 100 + room
-    def decode(g): return divmod(g, 100)
-
     def possible_starts(length):
         return [d * slots_per_day + p
                 for d in range(len(days))
@@ -24,38 +61,85 @@ def setup_ga(sessions, rooms, days, slots_per_day,
     start_opts = {l: possible_starts(l) for l in set(s['length'] for s in sessions)}
     room_indices = list(range(len(rooms)))
 
+    # Precompute per-session start options and lab/lecture-compatible room
+    # lists once; init_ind runs per individual and should only draw choices.
+    is_lab_room = [('lab' in r['name'].lower()) for r in rooms]
+    start_opts_per_session = [start_opts[s['length']] for s in sessions]
+    compatible_rooms = []
+    for s in sessions:
+        is_lab = 'lab' in s['name'].lower()
+        poss = [i for i, lab in enumerate(is_lab_room) if lab == is_lab]
+        compatible_rooms.append(poss or room_indices)
+
+    # Genome layout: two genes per session, [start_0, room_0, start_1, ...].
+    # No base-100 packing, so fitness decoding needs no divmod and room
+    # counts are not capped at 100.
     def init_ind():
         genome = []
-        for s in sessions:
-            start = random.choice(start_opts[s['length']])
-            # choose room indices matching lab/lecture preference if possible
-            poss_rooms = [i for i, r in enumerate(rooms)
-                          if (('lab' in s['name'].lower()) == ('lab' in r['name'].lower()))]
-            if not poss_rooms:
-                poss_rooms = room_indices
-            room = random.choice(poss_rooms)
-            genome.append(encode(start, room))
+        for i in range(len(sessions)):
+            genome.append(random.choice(start_opts_per_session[i]))
+            genome.append(random.choice(compatible_rooms[i]))
         return creator.Individual(genome)
 
     toolbox.register("individual", init_ind)
     toolbox.register("population", tools.initRepeat, list, toolbox.individual)
 
+    # Project block slots and the per-session elective/project flags are
+    # invariant over the run; build them once here instead of re-deriving
+    # them (string checks / callable calls) per fitness evaluation.
+    project_slots = (np.asarray(build_weekly_block_indices(days, slots_per_day,
+                                                           project_block_positions))
+                     if project_block_positions else None)
+    is_project_arr = (np.array([bool(is_project_func(s)) for s in sessions])
+                      if is_project_func else None)
+    is_elective_arr = np.array([bool(is_elective_func(s)) if is_elective_func
+                                else 'elective' in s['name'].lower()
+                                for s in sessions])
+
     from functools import partial
     fitness_func = partial(ga_fitness, sessions=sessions, rooms=rooms, days=days,
                           slots_per_day=slots_per_day, max_classes_per_day=5,
                           max_consec_slots=3, max_daily_hours_per_faculty=5,
-                          project_block_positions=project_block_positions, is_project_func=is_project_func)
+                          project_block_positions=project_block_positions,
+                          is_project_func=is_project_func, project_slots=project_slots,
+                          is_project_arr=is_project_arr, is_elective_arr=is_elective_arr)
+
+    toolbox.register("evaluate", CachedFitness(fitness_func))
+    if use_parallel:
+        # Parallel fitness evaluation across the population. The pool is
+        # exposed as toolbox._pool; the caller must close/join it once the
+        # GA run finishes.
+        pool = Pool()
+        toolbox.register("map", pool.map)
+        toolbox._pool = pool
+    else:
+        toolbox._pool = None
+    def cx_session_uniform(ind1, ind2):
+        """Uniform crossover over whole sessions: each (start, room) pair is
+        swapped between parents with probability 0.5, so offspring never mix
+        one parent's start with the other's room for the same session."""
+        for i in range(0, len(ind1), 2):
+            if random.random() < 0.5:
+                ind1[i], ind2[i] = ind2[i], ind1[i]
+                ind1[i+1], ind2[i+1] = ind2[i+1], ind1[i+1]
+        return ind1, ind2
+
+    def mut_session(ind, indpb):
+        """Re-draw a session's start and room from its precomputed options."""
+        for i in range(len(ind) // 2):
+            if random.random() < indpb:
+                ind[2*i] = random.choice(start_opts_per_session[i])
+                ind[2*i + 1] = random.choice(compatible_rooms[i])
+        return (ind,)
 
-    toolbox.register("evaluate", fitness_func)
-    toolbox.register("mate", tools.cxTwoPoint)
-    toolbox.register("mutate", tools.mutShuffleIndexes, indpb=0.05)
+    toolbox.register("mate", cx_session_uniform)
+    toolbox.register("mutate", mut_session, indpb=0.05)
     toolbox.register("select", tools.selTournament, tournsize=3)
 
     def decode_ind(ind):
         out = {}
-        for idx, g in enumerate(ind):
-            start, room = decode(g)
-            s = sessions[idx]
+        for idx, s in enumerate(sessions):
+            start, room = ind[2*idx], ind[2*idx + 1]
             out[s['sess_id']] = {
                 "start": start,
                 "room": rooms[room]["name"] if isinstance(room, int) else room,
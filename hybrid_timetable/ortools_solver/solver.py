@@ -1,8 +1,44 @@
+import multiprocessing
+import os
+import tempfile
+
 from ortools.sat.python import cp_model
 from collections import defaultdict
 
 from ..utils.helpers import absolute_slot, build_weekly_block_indices
 
+
+def _solve_model_proto(proto_text, max_time, num_search_workers):
+    """Rebuild a serialized CpModel proto and solve it.
+
+    Runs as the worker of a spawned child so the model memory and the
+    solve stay outside the building interpreter. Returns the flat
+    solution value list (indexable by variable index) or None."""
+    model = cp_model.CpModel()
+    model.Proto().parse_text_format(proto_text)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time
+    solver.parameters.num_search_workers = num_search_workers
+    solver.parameters.random_seed = 42
+    solver.parameters.log_search_progress = False
+    status = solver.Solve(model)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return list(solver.ResponseProto().solution)
+    return None
+
+
+def _serialize_model(model):
+    """Text-format serialization of a CpModel (the binding exposes no
+    binary parse, so text format is the portable round-trip)."""
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        model.ExportToFile(path)
+        with open(path) as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
 def solve_with_ortools_intervals(sessions, rooms, days, slots_per_day,
                                  max_time=30, max_consec_slots=3,
                                  max_classes_per_day=6, max_weekly_hours_per_faculty=20,
@@ -11,40 +47,105 @@ def solve_with_ortools_intervals(sessions, rooms, days, slots_per_day,
                                  enforce_rooms=False,
                                  project_block_positions=None,
                                  is_project_func=None,
-                                 min_group_days=3):
+                                 min_group_days=3,
+                                 num_search_workers=8,
+                                 warm_start=None,
+                                 use_subprocess=False):
     """
     CP-SAT model using interval variables and NoOverlap for resources.
     Added: min_group_days (hard) — each group must occupy at least that many distinct days.
+    warm_start maps sess_id -> start slot from a previous solve/GA run and
+    is passed to CP-SAT as solution hints.
     """
     total_slots = len(days) * slots_per_day
+
+    # Weekly faculty load involves no decision variables — every session
+    # must be scheduled — so it is a plain data check. Failing here beats
+    # handing CP-SAT a trivially infeasible model.
+    faculty_weekly_load = defaultdict(int)
+    for s in sessions:
+        faculty_weekly_load[s['faculty']] += s['length']
+    for f, load in faculty_weekly_load.items():
+        if load > max_weekly_hours_per_faculty:
+            raise ValueError(
+                f"Faculty {f} has {load} weekly hours of sessions, "
+                f"exceeding the cap of {max_weekly_hours_per_faculty}.")
+
     model = cp_model.CpModel()
 
-    # Precompute possible starts per session to limit domains
-    possible_starts = {}
+    # Precompute start domains per session length: one contiguous range
+    # per day instead of enumerating every feasible start value, which
+    # keeps the domain representation in the proto compact.
+    start_domains = {}
     for s in sessions:
         L = s['length']
-        starts = []
-        for d in range(len(days)):
-            for p in range(slots_per_day - L + 1):
-                starts.append(d * slots_per_day + p)
-        possible_starts[s['sess_id']] = starts
+        if L not in start_domains:
+            start_domains[L] = cp_model.Domain.FromIntervals(
+                [[d * slots_per_day, (d + 1) * slots_per_day - L]
+                 for d in range(len(days))])
 
-    # Create vars and intervals
+    # Create vars and intervals. Sessions cannot cross day boundaries, so
+    # the faculty/group no-overlap decomposes into one small NoOverlap per
+    # (entity, day) over optional day-intervals instead of one large
+    # constraint per entity — CP-SAT's presolve does not find that split
+    # on its own. Rooms keep a global NoOverlap: their presence literal
+    # already encodes the room assignment, not the day.
     sess_vars = {}
     intervals_for_room = defaultdict(list)
-    intervals_for_faculty = defaultdict(list)
-    intervals_for_group = defaultdict(list)
+    day_intervals_for_faculty = defaultdict(list)
+    day_intervals_for_group = defaultdict(list)
+
+    fac_count = defaultdict(int)
+    grp_count = defaultdict(int)
+    for s in sessions:
+        fac_count[s['faculty']] += 1
+        grp_count[s['group']] += 1
+
+    # Optional room intervals only matter where two sessions can contend
+    # for the same room; count candidates up front so singleton rooms
+    # never get the opt-var/reified machinery at all.
+    if enforce_rooms:
+        room_candidates = defaultdict(int)
+        for s in sessions:
+            dom = (room_preference.get(s['sess_id'])
+                   if room_preference else None) or range(len(rooms))
+            for r in dom:
+                room_candidates[r] += 1
 
     for s in sessions:
         sid = s['sess_id']
-        starts = possible_starts[sid]
-        start_var = model.NewIntVarFromDomain(cp_model.Domain.FromValues(starts), f"start_{sid}")
-        end_var = model.NewIntVar(min(starts) + s['length'], max(starts) + s['length'], f"end_{sid}")
+        start_var = model.NewIntVarFromDomain(start_domains[s['length']], f"start_{sid}")
+        end_var = model.NewIntVar(s['length'], total_slots, f"end_{sid}")
         interval = model.NewIntervalVar(start_var, s['length'], end_var, f"int_{sid}")
-        sess_vars[sid] = {"start": start_var, "end": end_var, "interval": interval, "meta": s}
 
-        intervals_for_faculty[s['faculty']].append(interval)
-        intervals_for_group[s['group']].append(interval)
+        # One set of day-indicator booleans per session, shared by every
+        # daily constraint below. The day of each feasible start is known
+        # statically, so the booleans channel through linear range
+        # constraints plus an exactly-one — no integer-division propagator:
+        # the chosen boolean pins the start into its day's slot range, and
+        # any other day's boolean would contradict the actual start.
+        on_day = []
+        for d in range(len(days)):
+            b = model.NewBoolVar(f"{sid}_day{d}")
+            model.AddLinearConstraint(start_var, d * slots_per_day,
+                                      (d + 1) * slots_per_day - 1).OnlyEnforceIf(b)
+            on_day.append(b)
+        model.AddExactlyOne(on_day)
+
+        sess_vars[sid] = {"start": start_var, "end": end_var, "interval": interval,
+                          "on_day": on_day, "meta": s}
+
+        # One optional day-interval per (session, day), present iff the
+        # session lands on that day; shared by both entity dimensions.
+        # Singleton faculties/groups can never overlap and need none.
+        if fac_count[s['faculty']] > 1 or grp_count[s['group']] > 1:
+            for d, b in enumerate(on_day):
+                opt = model.NewOptionalIntervalVar(start_var, s['length'], end_var,
+                                                   b, f"dint_{sid}_d{d}")
+                if fac_count[s['faculty']] > 1:
+                    day_intervals_for_faculty[(s['faculty'], d)].append(opt)
+                if grp_count[s['group']] > 1:
+                    day_intervals_for_group[(s['group'], d)].append(opt)
 
         if enforce_rooms:
             room_dom = list(range(len(rooms)))
@@ -55,107 +156,80 @@ def solve_with_ortools_intervals(sessions, rooms, days, slots_per_day,
                 model.AddAllowedAssignments([room_var], [[r] for r in room_dom])
             sess_vars[sid]["room"] = room_var
             for r in room_dom:
+                if room_candidates[r] < 2:
+                    continue
                 opt_var = model.NewBoolVar(f"assign_{sid}_room{r}")
                 opt_interval = model.NewOptionalIntervalVar(start_var, s['length'], end_var, opt_var, f"optint_{sid}_r{r}")
                 intervals_for_room[r].append(opt_interval)
                 model.Add(room_var == r).OnlyEnforceIf(opt_var)
                 model.Add(room_var != r).OnlyEnforceIf(opt_var.Not())
 
-    # No-overlap per faculty/group
-    for faculty, ints in intervals_for_faculty.items():
+    # No-overlap per (faculty, day) / (group, day)
+    for ints in day_intervals_for_faculty.values():
         if len(ints) > 1:
             model.AddNoOverlap(ints)
-    for group, ints in intervals_for_group.items():
+    for ints in day_intervals_for_group.values():
         if len(ints) > 1:
             model.AddNoOverlap(ints)
 
     # Rooms non-overlap (if enforced)
     if enforce_rooms:
-        for r, ints in intervals_for_room.items():
+        for ints in intervals_for_room.values():
             if len(ints) > 1:
                 model.AddNoOverlap(ints)
 
+    # Symmetry breaking: sessions expanded from the same course are
+    # interchangeable (same faculty/group/name/length), so permuting them
+    # only relabels a solution. Ordering their starts removes that
+    # factorial symmetry from the search space.
+    twins = defaultdict(list)
+    for s in sessions:
+        twins[(s['faculty'], s['group'], s['name'], s['length'])].append(s['sess_id'])
+    for sids in twins.values():
+        for a, b in zip(sids, sids[1:]):
+            model.Add(sess_vars[a]['start'] < sess_vars[b]['start'])
+
     # ---------- HARD NEP CONSTRAINTS ----------
 
-    # Faculty weekly load (sum of lengths)
-    for f in intervals_for_faculty:
-        weekly_load = []
+    # Bucket sessions by faculty and group once; every constraint block
+    # below walks its bucket instead of filtering all sessions repeatedly.
+    fac_sessions = defaultdict(list)
+    grp_sessions = defaultdict(list)
+    for var in sess_vars.values():
+        fac_sessions[var["meta"]["faculty"]].append(var)
+        grp_sessions[var["meta"]["group"]].append(var)
+
+    # Fused day loop feeding all daily constraints: each (session, day)
+    # pair creates one affine length term, shared by the faculty and group
+    # caps.
+    for d in range(len(days)):
         for sid, var in sess_vars.items():
-            if var["meta"]["faculty"] == f:
-                weekly_load.append(var["meta"]["length"])
-        if weekly_load:
-            model.Add(sum(weekly_load) <= max_weekly_hours_per_faculty)
+            is_on_day = var["on_day"][d]
+            length = var["meta"]["length"]
+            # bool * constant is an affine expression — no auxiliary IntVar
+            # or reified equalities needed to count length-weighted days.
+            term = is_on_day if length == 1 else is_on_day * length
+            var.setdefault("day_terms", []).append(term)
 
-    # Faculty daily cap (we model "session starts on day d" booleans and multiply by lengths)
-    for f in intervals_for_faculty:
-        for d in range(len(days)):
-            daily_terms = []
-            for sid, var in sess_vars.items():
-                if var["meta"]["faculty"] == f:
-                    is_on_day = model.NewBoolVar(f"{sid}_fac_day{d}")
-                    # day_var = floor(start / slots_per_day)
-                    day_var = model.NewIntVar(0, len(days)-1, f"{sid}_fac_dayvar")
-                    model.AddDivisionEquality(day_var, var["start"], slots_per_day)
-                    model.Add(day_var == d).OnlyEnforceIf(is_on_day)
-                    model.Add(day_var != d).OnlyEnforceIf(is_on_day.Not())
-                    # We'll count length * is_on_day as linear by expanding (length * bool) as int with bounds
-                    if var["meta"]["length"] == 1:
-                        daily_terms.append(is_on_day)
-                    else:
-                        # create int term length_if = length * is_on_day (use linearization)
-                        length_if = model.NewIntVar(0, var["meta"]["length"], f"{sid}_fac_len_day{d}")
-                        model.Add(length_if == var["meta"]["length"]).OnlyEnforceIf(is_on_day)
-                        model.Add(length_if == 0).OnlyEnforceIf(is_on_day.Not())
-                        daily_terms.append(length_if)
-            if daily_terms:
-                model.Add(sum(daily_terms) <= max_daily_hours_per_faculty)
-
-    # Group daily cap (max classes per day) - already similar to above
-    groups = set(s['group'] for s in sessions)
-    for g in groups:
-        for d in range(len(days)):
-            daily_terms = []
-            for sid, var in sess_vars.items():
-                if var["meta"]["group"] == g:
-                    is_on_day = model.NewBoolVar(f"{sid}_grp_day{d}")
-                    day_var = model.NewIntVar(0, len(days)-1, f"{sid}_grp_dayvar")
-                    model.AddDivisionEquality(day_var, var["start"], slots_per_day)
-                    model.Add(day_var == d).OnlyEnforceIf(is_on_day)
-                    model.Add(day_var != d).OnlyEnforceIf(is_on_day.Not())
-                    if var["meta"]["length"] == 1:
-                        daily_terms.append(is_on_day)
-                    else:
-                        length_if = model.NewIntVar(0, var["meta"]["length"], f"{sid}_grp_len_day{d}")
-                        model.Add(length_if == var["meta"]["length"]).OnlyEnforceIf(is_on_day)
-                        model.Add(length_if == 0).OnlyEnforceIf(is_on_day.Not())
-                        daily_terms.append(length_if)
-            if daily_terms:
-                model.Add(sum(daily_terms) <= max_classes_per_day)
+        # Faculty daily cap
+        for f, fvars in fac_sessions.items():
+            model.Add(sum(v["day_terms"][d] for v in fvars) <= max_daily_hours_per_faculty)
+        # Group daily cap (max classes per day)
+        for g, gvars in grp_sessions.items():
+            model.Add(sum(v["day_terms"][d] for v in gvars) <= max_classes_per_day)
 
     # MIN DISTINCT DAYS per group (NEP: spread across week)
     # Create used_g_d booleans: True iff group g has at least one session starting on day d.
-    for g in groups:
+    for g, gvars in grp_sessions.items():
         used_day_bools = []
         for d in range(len(days)):
             used = model.NewBoolVar(f"used_{g}_day{d}")
             # used implies exists a session of group g on day d
-            # build list of booleans is_on_day for sessions in group
-            is_on_day_vars = []
-            for sid, var in sess_vars.items():
-                if var["meta"]["group"] == g:
-                    is_on = model.NewBoolVar(f"{sid}_is_{g}_day{d}")
-                    day_var = model.NewIntVar(0, len(days)-1, f"{sid}_{g}_dayvar{d}")
-                    model.AddDivisionEquality(day_var, var["start"], slots_per_day)
-                    # Link is_on with equality as before
-                    model.Add(day_var == d).OnlyEnforceIf(is_on)
-                    model.Add(day_var != d).OnlyEnforceIf(is_on.Not())
-                    is_on_day_vars.append(is_on)
+            is_on_day_vars = [v["on_day"][d] for v in gvars]
             if is_on_day_vars:
-                # If any is_on_day_vars true then used == True
-                model.AddBoolOr(is_on_day_vars).OnlyEnforceIf(used)
-                # If used false then all is_on_day_vars false
-                for v in is_on_day_vars:
-                    model.Add(v == False).OnlyEnforceIf(used.Not())
+                # used == OR(is_on_day_vars): both sides are 0/1, so a
+                # single max-equality replaces the dual reified clauses.
+                model.AddMaxEquality(used, is_on_day_vars)
             else:
                 # no sessions for group -> used is false
                 model.Add(used == False)
@@ -165,16 +239,51 @@ def solve_with_ortools_intervals(sessions, rooms, days, slots_per_day,
         effective_min = min(min_group_days, len(days))
         model.Add(sum(used_day_bools) >= effective_min)
 
-    # Objective: place sessions as early as possible (simple prototype objective)
-    model.Minimize(sum(sess_vars[sid]['start'] for sid in sess_vars))
+    # Warm start: hint starts from a previous solution so CP-SAT can
+    # repair it instead of searching from scratch on re-solves.
+    if warm_start:
+        for sid, st in warm_start.items():
+            if sid in sess_vars:
+                model.AddHint(sess_vars[sid]['start'], st)
+
+    # Objective: minimize the makespan first (its LP relaxation gives the
+    # linearization workers a tight bound, unlike a bare sum of starts),
+    # with sum-of-starts as the lexicographic tiebreak so sessions still
+    # pack early within the chosen horizon. sum(starts) < N * total_slots,
+    # so that weight makes the two stages strictly lexicographic.
+    makespan = model.NewIntVar(0, total_slots, "makespan")
+    for info in sess_vars.values():
+        model.Add(makespan >= info['end'])
+    model.Minimize(makespan * (len(sess_vars) * total_slots)
+                   + sum(info['start'] for info in sess_vars.values()))
+
+    if use_subprocess:
+        # Hand the serialized proto to a spawned child and solve there;
+        # useful when many model variants are built and solved in a row.
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(1) as pool:
+            solution = pool.apply(_solve_model_proto,
+                                  (_serialize_model(model), max_time,
+                                   min(num_search_workers, 16)))
+        if solution is None:
+            return None
+        result = {}
+        for sid, info in sess_vars.items():
+            st = solution[info['start'].Index()]
+            room = None
+            if enforce_rooms and 'room' in info:
+                room = solution[info['room'].Index()]
+            result[sid] = (st, room)
+        return result
 
     solver = cp_model.CpSolver()
     solver.parameters.max_time_in_seconds = max_time
-    solver.parameters.num_search_workers = 8
+    # CP-SAT's portfolio benefits from extra workers (LNS workers kick in
+    # beyond the generic ones), but returns are non-monotonic at very high
+    # counts, so cap at 16.
+    solver.parameters.num_search_workers = min(num_search_workers, 16)
     solver.parameters.random_seed = 42
-    solver.parameters.log_search_progress = True
-    solver.parameters.cp_model_probing_level = 0
-    solver.parameters.cp_model_presolve = False
+    solver.parameters.log_search_progress = False
 
     status = solver.Solve(model)
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
@@ -191,10 +300,13 @@ def solve_with_ortools_intervals(sessions, rooms, days, slots_per_day,
 # wrapper
 def solve_with_ortools(sessions, rooms, days, slots_per_day, max_time=30, max_classes_per_day=5,
                        max_consec_slots=3, max_weekly_hours_per_faculty=20, max_daily_hours_per_faculty=5,
-                       project_block_positions=None, is_project_func=None, min_group_days=3):
+                       project_block_positions=None, is_project_func=None, min_group_days=3,
+                       num_search_workers=8, warm_start=None, use_subprocess=False):
     return solve_with_ortools_intervals(sessions, rooms, days, slots_per_day, max_time=max_time,
                                         max_consec_slots=max_consec_slots, max_classes_per_day=max_classes_per_day,
                                         max_weekly_hours_per_faculty=max_weekly_hours_per_faculty,
                                         max_daily_hours_per_faculty=max_daily_hours_per_faculty,
                                         enforce_rooms=False, project_block_positions=project_block_positions,
-                                        is_project_func=is_project_func, min_group_days=min_group_days)
+                                        is_project_func=is_project_func, min_group_days=min_group_days,
+                                        num_search_workers=num_search_workers, warm_start=warm_start,
+                                        use_subprocess=use_subprocess)
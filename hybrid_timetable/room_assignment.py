@@ -5,6 +5,11 @@ def greedy_room_assignment(schedule_times, sessions, rooms, group_sizes):
     room_schedule = {r: set() for r in range(len(rooms))}
     assignment = {}
 
+    # Only two preference classes exist, so the per-session room ordering
+    # is one of two precomputed lists instead of a sort per session.
+    lab_rooms = [i for i, r in enumerate(rooms) if 'lab' in r['name'].lower()]
+    lecture_rooms = [i for i, r in enumerate(rooms) if 'lab' not in r['name'].lower()]
+
     # sort: labs (longer) first, then larger groups first
     sess_list = sorted(sessions, key=lambda s: (-s['length'], -group_sizes.get(s['group'], 0)))
     for s in sess_list:
@@ -17,24 +22,19 @@ def greedy_room_assignment(schedule_times, sessions, rooms, group_sizes):
         # prefer lecture rooms for lectures, labs for labs (simple heuristic)
         name_low = s['name'].lower()
         prefer_lab = ('lab' in name_low) or ('project' in name_low)
-        room_order = list(range(len(rooms)))
-        # prefer matching rooms first
-        room_order.sort(key=lambda r_idx: (('lab' in rooms[r_idx]['name'].lower()) != prefer_lab))
+        room_order = (lab_rooms + lecture_rooms) if prefer_lab else (lecture_rooms + lab_rooms)
+        slot_range = range(start, start + s['length'])
         for r in room_order:
             room = rooms[r]
             if size > room["capacity"]:
                 continue
-            conflict = False
-            for off in range(s['length']):
-                if (start + off) in room_schedule[r]:
-                    conflict = True
-                    break
-            if not conflict:
-                for off in range(s['length']):
-                    room_schedule[r].add(start + off)
-                assignment[sid] = room["name"]
-                placed = True
-                break
+            # C-level set ops instead of per-offset membership loops
+            if not room_schedule[r].isdisjoint(slot_range):
+                continue
+            room_schedule[r].update(slot_range)
+            assignment[sid] = room["name"]
+            placed = True
+            break
         if not placed:
             return None
     return assignment
@@ -1,11 +1,16 @@
 from .utils.helpers import expand_courses
 from .ortools_solver.solver import solve_with_ortools
 from .room_assignment import greedy_room_assignment
-from .ga_module.ga_setup import setup_ga
+from .ga_module.ga_setup import setup_ga, CachedFitness
 from .ga_module.fitness import ga_fitness
 from deap import tools, algorithms
 import numpy as np
 
+# Best start times from the most recent GA run, keyed by sess_id. Re-solves
+# in the same process hand these to CP-SAT as hints (same idea as seeding
+# the first GA individual with the feasible solution).
+_warm_start_cache = None
+
 def generate_timetable(courses, rooms, days, slots_per_day,
                        ngen=40, pop_size=60, max_time=30,
                        max_classes_per_day=5, max_consec_slots=3,
@@ -14,17 +19,22 @@ def generate_timetable(courses, rooms, days, slots_per_day,
                        project_block_positions=None, is_project_func=None,
                        faculty_prefs=None, group_sizes=None,
                        use_ga=True, assign_rooms=True, min_group_days=3,
-                       day_balance_fraction=0.4, elective_groups=None):
+                       day_balance_fraction=0.4, elective_groups=None,
+                       num_search_workers=8):
     """
     Hybrid NEP2020 Timetable Generator
     - OR-Tools ensures feasibility (hard)
     - Greedy room assignment respects capacities (if assign_rooms True)
     - GA refinement optimizes NEP soft goals (day-balance, gaps, workload)
     """
+    global _warm_start_cache
+    # expand_courses already emits slotted Session records: attribute-backed
+    # field access for the GA hot path, dict-style lookups for the rest.
     sessions = expand_courses(courses)
 
     # Step 1: OR-Tools placement (times only)
     feasible = solve_with_ortools(sessions, rooms, days, slots_per_day,
+                                  warm_start=_warm_start_cache,
                                   max_time=max_time,
                                   max_classes_per_day=max_classes_per_day,
                                   max_consec_slots=max_consec_slots,
@@ -32,7 +42,8 @@ def generate_timetable(courses, rooms, days, slots_per_day,
                                   max_daily_hours_per_faculty=max_daily_hours_per_faculty,
                                   project_block_positions=project_block_positions,
                                   is_project_func=is_project_func,
-                                  min_group_days=min_group_days)
+                                  min_group_days=min_group_days,
+                                  num_search_workers=num_search_workers)
     if not feasible:
         raise RuntimeError("No feasible solution from OR-Tools.")
 
@@ -59,8 +70,17 @@ def generate_timetable(courses, rooms, days, slots_per_day,
 
         # inject day_balance_fraction into fitness function
         from functools import partial
+        from .utils.helpers import build_weekly_block_indices
+        project_slots = (np.asarray(build_weekly_block_indices(
+            days, slots_per_day, project_block_positions))
+            if project_block_positions else None)
+        is_project_arr = (np.array([bool(is_project_func(s)) for s in sessions])
+                          if is_project_func else None)
+        is_elective_arr = np.array([bool(is_elective_func(s)) if is_elective_func
+                                    else 'elective' in s['name'].lower()
+                                    for s in sessions])
         toolbox.unregister("evaluate")
-        toolbox.register("evaluate", partial(
+        toolbox.register("evaluate", CachedFitness(partial(
             ga_fitness,
             sessions=sessions,
             rooms=rooms,
@@ -71,25 +91,27 @@ def generate_timetable(courses, rooms, days, slots_per_day,
             max_daily_hours_per_faculty=max_daily_hours_per_faculty,
             project_block_positions=project_block_positions,
             is_project_func=is_project_func,
+            project_slots=project_slots,
+            is_project_arr=is_project_arr,
+            is_elective_arr=is_elective_arr,
             group_sizes=group_sizes,
             day_balance_fraction=day_balance_fraction
-        ))
+        )))
 
-        def encode(start, room):
+        def room_index(room):
             if isinstance(room, str):
-                room_idx = next((i for i, r in enumerate(rooms) if r["name"] == room), 0)
-            else:
-                room_idx = room if room is not None else 0
-            return int(start) * 100 + int(room_idx)
+                return next((i for i, r in enumerate(rooms) if r["name"] == room), 0)
+            return room if room is not None else 0
 
         feasible_vals = []
         for s in sessions:
-            sid = s['sess_id']
-            st, rm = feasible[sid]
-            feasible_vals.append(encode(st, rm))
+            st, rm = feasible[s['sess_id']]
+            feasible_vals.append(int(st))
+            feasible_vals.append(int(room_index(rm)))
 
+        import array
         seed_ind = toolbox.individual()
-        seed_ind[:] = feasible_vals
+        seed_ind[:] = array.array('i', feasible_vals)
 
         # Step 3 continued: GA refinement
         pop = toolbox.population(n=pop_size)
@@ -101,16 +123,23 @@ def generate_timetable(courses, rooms, days, slots_per_day,
         stats.register("min", np.min)
         stats.register("max", np.max)
 
-        algorithms.eaSimple(pop, toolbox, cxpb=0.7, mutpb=0.2, ngen=ngen,
-                            stats=stats, halloffame=hof, verbose=True)
+        try:
+            algorithms.eaSimple(pop, toolbox, cxpb=0.7, mutpb=0.2, ngen=ngen,
+                                stats=stats, halloffame=hof, verbose=True)
+        finally:
+            if getattr(toolbox, "_pool", None) is not None:
+                toolbox._pool.close()
+                toolbox._pool.join()
 
         # decode best individual
         best_schedule = decode(hof[0])
+        _warm_start_cache = {sid: info["start"] for sid, info in best_schedule.items()}
         return best_schedule
 
     # If GA disabled, just return feasible OR-Tools schedule
+    sessions_by_id = {s['sess_id']: s for s in sessions}
     schedule_dict = {}
     for sid, (st, rm) in feasible.items():
-        s = next(s for s in sessions if s['sess_id'] == sid)
+        s = sessions_by_id[sid]
         schedule_dict[sid] = {"start": st, "room": rm, "length": s['length'], "meta": s}
     return schedule_dict
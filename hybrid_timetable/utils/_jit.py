@@ -0,0 +1,114 @@
+"""
+Optional Numba-accelerated kernels for the occupancy scatter loops.
+
+Numba is not a hard dependency: when it is unavailable the callers fall
+back to their NumPy implementations, so importing this module is always
+safe.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
+
+
+def _scatter_impl(rows, starts, lengths, total_slots, n_entities):
+    """Build an (n_entities, total_slots) occupancy matrix from flat arrays."""
+    matrix = np.zeros((n_entities, total_slots), dtype=np.int32)
+    for i in range(rows.shape[0]):
+        start = starts[i]
+        for off in range(lengths[i]):
+            slot = start + off
+            if slot >= total_slots:
+                slot = total_slots - 1
+            matrix[rows[i], slot] += 1
+    return matrix
+
+
+def _slot_counts_impl(starts, lengths, total_slots):
+    """Count sessions occupying each absolute slot (slots past the end are dropped)."""
+    counts = np.zeros(total_slots, dtype=np.int32)
+    for i in range(starts.shape[0]):
+        start = starts[i]
+        for off in range(lengths[i]):
+            slot = start + off
+            if slot < total_slots:
+                counts[slot] += 1
+    return counts
+
+
+def _clash_penalty_impl(fac_rows, grp_rows, room_rows, slots,
+                        n_fac, n_grp, n_room, width):
+    """Summed overlap penalty (200 per extra occupant) over the three
+    occupancy dimensions, from per-occupied-slot expansion arrays."""
+    fac_occ = np.zeros(n_fac * width, dtype=np.int32)
+    grp_occ = np.zeros(n_grp * width, dtype=np.int32)
+    room_occ = np.zeros(n_room * width, dtype=np.int32)
+    penalty = 0
+    for i in range(slots.shape[0]):
+        slot = slots[i]
+        k = fac_rows[i] * width + slot
+        fac_occ[k] += 1
+        if fac_occ[k] > 1:
+            penalty += 200
+        k = grp_rows[i] * width + slot
+        grp_occ[k] += 1
+        if grp_occ[k] > 1:
+            penalty += 200
+        k = room_rows[i] * width + slot
+        room_occ[k] += 1
+        if room_occ[k] > 1:
+            penalty += 200
+    return penalty
+
+
+def _clash_scan_impl(ids, starts, lengths, width):
+    """Occupancy fill + over-occupancy detection for one entity dimension.
+
+    Returns the per-occupied-slot expansion (owner row, absolute slot) and
+    the indices of expanded entries whose (entity, slot) cell holds more
+    than one session, in traversal order."""
+    n = ids.shape[0]
+    total = 0
+    n_labels = 0
+    for i in range(n):
+        total += lengths[i]
+        if ids[i] + 1 > n_labels:
+            n_labels = ids[i] + 1
+    rep = np.empty(total, dtype=np.int64)
+    slot_exp = np.empty(total, dtype=np.int64)
+    keys = np.empty(total, dtype=np.int64)
+    counts = np.zeros(n_labels * width, dtype=np.int32)
+    pos = 0
+    for i in range(n):
+        for off in range(lengths[i]):
+            slot = starts[i] + off
+            rep[pos] = i
+            slot_exp[pos] = slot
+            keys[pos] = ids[i] * width + slot
+            counts[keys[pos]] += 1
+            pos += 1
+    n_hot = 0
+    for p in range(total):
+        if counts[keys[p]] > 1:
+            n_hot += 1
+    hot = np.empty(n_hot, dtype=np.int64)
+    j = 0
+    for p in range(total):
+        if counts[keys[p]] > 1:
+            hot[j] = p
+            j += 1
+    return rep, slot_exp, hot
+
+
+if njit is not None:
+    scatter_matrix = njit(cache=True)(_scatter_impl)
+    slot_counts = njit(cache=True)(_slot_counts_impl)
+    clash_penalty = njit(cache=True)(_clash_penalty_impl)
+    clash_scan = njit(cache=True)(_clash_scan_impl)
+else:
+    scatter_matrix = None
+    slot_counts = None
+    clash_penalty = None
+    clash_scan = None
@@ -1,34 +1,59 @@
-from collections import defaultdict
+import numpy as np
 from openpyxl.styles import PatternFill
 
+from ._jit import clash_scan
+
+_SESS_TYPES = ("lab", "lecture", "elective")
+
+
+def _expand(entity_ids, starts, lengths):
+    """Per-occupied-slot expansion of (entity, slot) pairs as flat arrays."""
+    rep = np.repeat(np.arange(len(entity_ids)), lengths)
+    offsets = np.concatenate([np.arange(l) for l in lengths])
+    return entity_ids[rep], starts[rep] + offsets, rep
+
+
 def detect_clashes(schedule, slots_per_day, rooms, group_sizes=None):
     clashes = {"faculty": [], "group": [], "room": [], "room_capacity": []}
-    faculty_occ = defaultdict(list)
-    group_occ = defaultdict(list)
-    room_occ = defaultdict(list)
-    session_type_count = defaultdict(int)
     room_map = {r['name']: r for r in rooms}
     lab_available = sum(1 for r in rooms if 'lab' in r['name'].lower())
     lecture_available = len(rooms) - lab_available
     elective_available = len(rooms)
 
+    if not schedule:
+        return clashes
+
+    # One pass flattening the schedule into parallel columns; occupancy
+    # counting then runs on NumPy bincounts instead of per-offset dict keys.
+    n = len(schedule)
+    sids, starts, lengths = [], [], []
+    fac_labels, room_labels, type_ids = [], [], []
+    grp_rows = []  # (session_index, group_label); multi-group sessions expand
+    # Per-group-row bookkeeping so emitted group clashes keep the old
+    # offset-outer / group-inner insertion order for multi-group sessions.
+    grp_base, grp_k, grp_pos = [], [], []
+    rank_acc = 0
     for sid, info in schedule.items():
         start, length, meta = info["start"], info["length"], info["meta"]
         room = info.get("room")
         name_lower = meta['name'].lower()
-        sess_type = 'lab' if 'lab' in name_lower or 'project' in name_lower else 'elective' if 'elective' in name_lower else 'lecture'
-
-        for offset in range(length):
-            slot = start + offset
-            faculty_occ[(meta['faculty'], slot)].append(sid)
-            if "groups" in meta and meta["groups"]:
-                for g in meta["groups"]:
-                    group_occ[(g, slot)].append(sid)
-            else:
-                group_occ[(meta['group'], slot)].append(sid)
-            if room:
-                room_occ[(room, slot)].append(sid)
-            session_type_count[(sess_type, slot)] += 1
+        sess_type = 0 if ('lab' in name_lower or 'project' in name_lower) \
+            else 2 if 'elective' in name_lower else 1
+
+        i = len(sids)
+        sids.append(sid)
+        starts.append(start)
+        lengths.append(length)
+        fac_labels.append(meta['faculty'])
+        room_labels.append(room)
+        type_ids.append(sess_type)
+        groups = meta["groups"] if meta.get("groups") else [meta['group']]
+        for p, g in enumerate(groups):
+            grp_rows.append((i, g))
+            grp_base.append(rank_acc)
+            grp_k.append(len(groups))
+            grp_pos.append(p)
+        rank_acc += length * len(groups)
 
         if room and group_sizes:
             g = meta['group']
@@ -37,17 +62,67 @@ def detect_clashes(schedule, slots_per_day, rooms, group_sizes=None):
             if size > cap:
                 clashes['room_capacity'].append((sid, g, room, size, cap))
 
-    for (faculty, slot), sids in faculty_occ.items():
-        if len(sids) > 1: clashes["faculty"].append((faculty, slot, sids))
-    for (group, slot), sids in group_occ.items():
-        if len(sids) > 1: clashes["group"].append((group, slot, sids))
-    for (room, slot), sids in room_occ.items():
-        if len(sids) > 1: clashes["room"].append((room, slot, sids))
-
-    for (sess_type, slot), count in session_type_count.items():
-        if sess_type == 'lab' and count > lab_available: clashes['room_capacity'].append((sess_type, slot, count, lab_available))
-        elif sess_type == 'lecture' and count > lecture_available: clashes['room_capacity'].append((sess_type, slot, count, lecture_available))
-        elif sess_type == 'elective' and count > elective_available: clashes['room_capacity'].append((sess_type, slot, count, elective_available))
+    starts = np.asarray(starts)
+    lengths = np.asarray(lengths)
+    type_ids = np.asarray(type_ids)
+    width = int((starts + lengths).max()) + 1
+
+    def scan(labels, owner_idx, clash_list, rank=None):
+        """Bincount occupancy for one entity dimension and report clashes."""
+        label_ids = {}
+        ids = np.fromiter((label_ids.setdefault(l, len(label_ids)) for l in labels),
+                          dtype=np.int64, count=len(labels))
+        if clash_scan is not None:
+            rep, slot_exp, hot = clash_scan(ids, starts[owner_idx],
+                                            lengths[owner_idx], width)
+        else:
+            ent_exp, slot_exp, rep = _expand(ids, starts[owner_idx],
+                                             lengths[owner_idx])
+            keys = ent_exp * width + slot_exp
+            counts = np.bincount(keys)
+            hot = np.flatnonzero(counts[keys] > 1)
+        if rank is not None and hot.size:
+            hot = hot[np.argsort(rank[hot], kind="stable")]
+        if hot.size:
+            # Collect sids only for over-occupied cells, walking the hot
+            # entries in traversal order so the emitted tuples match the
+            # old dict-insertion ordering.
+            owner = owner_idx[rep]
+            cells = {}
+            for i in hot:
+                cells.setdefault((labels[rep[i]], int(slot_exp[i])),
+                                 []).append(sids[owner[i]])
+            for (label, slot), cell_sids in cells.items():
+                clash_list.append((label, slot, cell_sids))
+
+    all_idx = np.arange(n)
+    scan(fac_labels, all_idx, clashes["faculty"])
+
+    grp_owner = np.array([i for i, _ in grp_rows])
+    grp_rep = np.repeat(np.arange(len(grp_rows)), lengths[grp_owner])
+    grp_off = np.concatenate([np.arange(l) for l in lengths[grp_owner]])
+    grp_rank = (np.asarray(grp_base)[grp_rep]
+                + grp_off * np.asarray(grp_k)[grp_rep]
+                + np.asarray(grp_pos)[grp_rep])
+    scan([g for _, g in grp_rows], grp_owner, clashes["group"], rank=grp_rank)
+
+    with_room = np.array([i for i in range(n) if room_labels[i]])
+    if with_room.size:
+        scan([room_labels[i] for i in with_room], with_room, clashes["room"])
+
+    # Session-type pressure: more simultaneous sessions of a type than
+    # rooms that can host it.
+    t_exp, t_slots, _ = _expand(type_ids, starts, lengths)
+    t_keys = t_exp * width + t_slots
+    t_counts = np.bincount(t_keys)
+    available = np.array([lab_available, lecture_available, elective_available])
+    uniq_keys, first_idx = np.unique(t_keys, return_index=True)
+    for key in uniq_keys[np.argsort(first_idx)]:  # first-seen order
+        count = int(t_counts[key])
+        t = key // width
+        if count > available[t]:
+            clashes['room_capacity'].append(
+                (_SESS_TYPES[t], int(key % width), count, int(available[t])))
 
     return clashes
 
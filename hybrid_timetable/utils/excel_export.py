@@ -1,14 +1,133 @@
+import datetime
+import time
+from collections import defaultdict
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import numpy as np
 from openpyxl import Workbook
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.cell import MergedCell
-from .clashes import highlight_clashes
-
-def export_schedule_to_excel(schedule, days, slots_per_day, filename="timetable.xlsx",
-                             time_labels=None, semester_name="Semester II",
-                             clashes=None, groups=None, faculties=None,
-                             room_matrix=None, section="A", dept="CSE-AI & ML",
-                             room_no="8202", ay="2025-26", section_incharge=None):
-    wb = Workbook()
+from openpyxl.utils import get_column_letter
+
+from .clashes import _expand
+from .helpers import categorize_name
+
+# Style singletons: openpyxl style objects are immutable, so constructing
+# them once avoids thousands of identical allocations in the cell loops.
+# Fills use 8-char ARGB — a bare RGB value gets a zero alpha channel.
+BOLD = Font(bold=True)
+TITLE_BOLD = Font(bold=True, size=16)
+HEADER_BOLD = Font(bold=True, size=14)
+RED_BOLD = Font(bold=True, color="FF0000")
+BLUE_BOLD = Font(bold=True, color="0000FF")
+GREEN_BOLD = Font(bold=True, color="008000")
+PURPLE_BOLD = Font(bold=True, color="800080")
+ORANGE_BOLD = Font(bold=True, color="FFA500")
+GREEN = Font(color="008000")
+SUMMARY_GREEN_BOLD = Font(bold=True, size=14, color="008000")
+CENTER = Alignment(horizontal="center")
+WRAP_CENTER = Alignment(wrap_text=True, horizontal="center", vertical="center")
+FILL_LAB = PatternFill("solid", fgColor="FFFFD9E6")
+FILL_ACTIVITY = PatternFill("solid", fgColor="FFD9FFD9")
+FILL_NORMAL = PatternFill("solid", fgColor="FFE6F3FF")
+FILL_CLASH = PatternFill("solid", fgColor="FFFF9999")
+# Indexed by the session category resolved in expand_courses.
+FILL_BY_CATEGORY = (FILL_LAB, FILL_ACTIVITY, FILL_NORMAL)
+
+
+def _len_longest_line(text):
+    """Widest line of a (possibly multi-line) cell value."""
+    return max(map(len, str(text).split("\n")))
+
+
+def _write_rows(ws, rows):
+    """Stream rows of plain values to a write-only sheet.
+
+    A styled entry is a ``(value, font)`` or ``(value, font, alignment)``
+    tuple; everything else is appended as-is.
+    """
+    for row in rows:
+        cells = []
+        for item in row:
+            if isinstance(item, tuple):
+                cell = WriteOnlyCell(ws, value=item[0])
+                if item[1]:
+                    cell.font = item[1]
+                if len(item) > 2 and item[2]:
+                    cell.alignment = item[2]
+                item = cell
+            cells.append(item)
+        ws.append(cells)
+
+
+def _schedule_to_arrays(schedule, slots_per_day):
+    """Structure-of-arrays view of a schedule: parallel NumPy arrays
+    indexed by position in ``list(schedule)``. Grid placement and
+    occupancy queries run on these instead of per-session dict walks."""
+    sids = list(schedule)
+    n = len(sids)
+    starts = np.empty(n, dtype=np.int32)
+    lengths = np.empty(n, dtype=np.int32)
+    rooms = np.empty(n, dtype=object)
+    for i, sid in enumerate(sids):
+        info = schedule[sid]
+        starts[i] = info["start"]
+        lengths[i] = info["length"]
+        rooms[i] = info["room"]
+    day_idx = starts // slots_per_day
+    slot_idx = starts - day_idx * slots_per_day
+    return sids, starts, lengths, day_idx, slot_idx, rooms
+
+def build_workbook(schedule, days, slots_per_day,
+                   time_labels=None, semester_name="Semester II",
+                   clashes=None, groups=None, faculties=None,
+                   room_matrix=None, section="A", dept="CSE-AI & ML",
+                   room_no="8202", ay="2025-26", section_incharge=None):
+    """Assemble the full timetable workbook without saving it."""
+    # Write-only workbook: rows are streamed out as they are appended, so
+    # no Cell objects are retained across the many per-entity sheets.
+    # Styles travel on WriteOnlyCell instances, merges are declared on
+    # merged_cells.ranges and column widths are set before saving.
+    wb = Workbook(write_only=True)
+
+    # Columnar view of the schedule: start/length/day/slot resolved once
+    # as arrays rather than per sheet per session.
+    sids, starts, lengths, day_arr, slot_arr, rooms_arr = \
+        _schedule_to_arrays(schedule, slots_per_day)
+
+    # One pass over the schedule builds every per-sheet subset; the sheet
+    # loops and statistics below index these instead of re-scanning.
+    # Subsets are plain lists of sess_ids; every sheet reads session
+    # details from the shared rendered table, so no per-entity dicts.
+    by_group = defaultdict(list)
+    by_faculty = defaultdict(list)
+    by_room = defaultdict(list)
+    # A session appears on up to four sheets (master/group/faculty/room);
+    # its cell text, grid position and fill are rendered once and reused.
+    # Sessions are sorted by start once here: the grouping pass runs in
+    # that order, so every subset list comes out presorted and make_sheet
+    # never sorts again.
+    order = np.argsort(starts, kind="stable")
+    sorted_sids = [sids[i] for i in order]
+    rendered = {}
+    for i, sid in zip(order, sorted_sids):
+        info = schedule[sid]
+        meta = info["meta"]
+        by_group[meta["group"]].append(sid)
+        by_faculty[meta["faculty"]].append(sid)
+        by_room[info["room"]].append(sid)
+
+        # Session records carry their category from expand_courses; bare
+        # meta dicts (external callers) fall back to classifying here.
+        cat = meta.get("category")
+        if cat is None:
+            cat = categorize_name(meta['name'])
+        fill = FILL_BY_CATEGORY[cat]
+        rendered[sid] = (int(starts[i]), int(lengths[i]),
+                         int(day_arr[i]), int(slot_arr[i]),
+                         f"{meta['name']} ({meta['faculty']})\n{info['room']}\n{meta['group']}",
+                         fill)
 
     # Default time labels (your real slots)
     if time_labels is None:
@@ -17,269 +136,286 @@ def export_schedule_to_excel(schedule, days, slots_per_day, filename="timetable.
             "12:20-01:10","01:10-01:55","01:55-02:40","02:40-03:25","03:25-04:10"
         ][:slots_per_day]
 
-    def make_sheet(ws, schedule_subset, title, subtitle=None):
+    # Header row and slot-label column are identical on every sheet, so
+    # their WriteOnlyCell objects are built once and appended everywhere;
+    # write-only sheets serialize cells on append, so sharing is safe.
+    # Shared cells must carry a style: the write-only row writer reuses an
+    # unstyled cell as its scratch cell and corrupts it on the next value.
+    ws_index = wb.create_sheet("Index")
+    header_cells = []
+    for v in ["Slot/Day"] + list(days):
+        cell = WriteOnlyCell(ws_index, value=v)
+        cell.font = BOLD
+        header_cells.append(cell)
+    slot_cells = []
+    for s in range(slots_per_day):
+        cell = WriteOnlyCell(ws_index, value=f"Slot {s + 1}\n{time_labels[s]}")
+        cell.alignment = WRAP_CENTER
+        slot_cells.append(cell)
+
+    # Column letters resolved once for the timetable grid; a plain list
+    # index beats a function call per merge/width and, unlike the old
+    # chr(65 + ...) arithmetic, stays correct past column Z.
+    col_letters = [get_column_letter(i + 1) for i in range(len(days) + 1)]
+
+    def make_sheet(ws, sess_ids, title, subtitle=None, clash_mask=None):
         ws.title = title
 
         # Top header (college info)
-        # Removed institution details as per user request
-        # ws.merge_cells(start_row=1, end_row=1, start_column=1, end_column=len(days)+1)
-        # ws.cell(row=1, column=1, value="SREENIDHI INSTITUTE OF SCIENCE AND TECHNOLOGY").font = Font(bold=True, size=14)
-        # ws.cell(row=1, column=1).alignment = Alignment(horizontal="center")
-
-        # ws.merge_cells(start_row=2, end_row=2, start_column=1, end_column=len(days)+1)
-        # ws.cell(row=2, column=1, value=f"DEPARTMENT OF {dept} | A.Y. {ay} | Section {section} | Room No: {room_no}").font = Font(bold=True, size=12)
-        # ws.cell(row=2, column=1).alignment = Alignment(horizontal="center")
-
-        # Table header
-        ws.cell(row=3, column=1, value="Slot/Day").font = Font(bold=True)
-        for j, day in enumerate(days, start=2):
-            ws.cell(row=3, column=j, value=day).font = Font(bold=True)
-
-        # Slot labels + lunch row
+        # Removed institution details as per user request (rows 1-2 stay
+        # blank so the layout is unchanged).
+
+        # Pre-plan the sheet as a value grid plus per-cell fills and merge
+        # spans; write-only sheets take whole rows, so everything must be
+        # known before the first append.
+        n_cols = len(days) + 1
+        grid = [[None] * n_cols for _ in range(slots_per_day)]
+
+        # Occupied-cell plan: the first session (by start) owns each cell,
+        # later sessions landing on occupied cells are skipped with a
+        # warning — no merge bookkeeping or cancellation needed.
         row_offset = 4
-        for slot, label in enumerate(time_labels, start=1):
-            ws.cell(row=row_offset + slot - 1, column=1, value=f"Slot {slot}\n{label}")
-
-        # Fill schedule
-        for sess_id, info in sorted(schedule_subset.items(), key=lambda x: x[1]["start"]):
-            start = info["start"]
-            length = info["length"]
-            room = info["room"]
-            meta = info["meta"]
-
-            day_idx = start // slots_per_day
-            slot_idx = start % slots_per_day
-
-            text = f"{meta['name']} ({meta['faculty']})\n{room}\n{meta['group']}"
+        occupied = set()
+        fills = {}
+        merges = []
+        skipped = 0
+        for sess_id in sess_ids:
+            start, length, day_idx, slot_idx, text, fill = rendered[sess_id]
 
             r1 = row_offset + slot_idx
             r2 = r1 + length - 1
             c = day_idx + 2
 
-            # Get the target cell
-            cell = ws.cell(row=r1, column=c)
-
-            # Check if it's already in a merged range
-            for merged_range in list(ws.merged_cells.ranges):
-                if cell.coordinate in merged_range:
-                    # Unmerge so we can write safely
-                    ws.unmerge_cells(str(merged_range))
-                    cell = ws.cell(row=merged_range.min_row, column=merged_range.min_col)
-                    break
-
-            # Now safe to write
-            cell.value = text
-            cell.alignment = Alignment(wrap_text=True, horizontal="center", vertical="center")
+            span = [(r, c) for r in range(r1, r2 + 1)]
+            if any(rc in occupied for rc in span):
+                skipped += 1
+                continue
+            occupied.update(span)
 
-            # Merge multi-slot labs after writing
+            grid[slot_idx][day_idx + 1] = text
+            if clash_mask is not None and clash_mask[day_idx][slot_idx]:
+                fill = FILL_CLASH
+            fills[(r1, c)] = fill
             if length > 1:
-                ws.merge_cells(start_row=r1, end_row=r2, start_column=c, end_column=c)
-
-            cname = meta['name'].lower()
-            if "lab" in cname:
-                cell.fill = PatternFill(start_color="FFD9E6", end_color="FFD9E6", fill_type="solid")
-            elif "sports" in cname or "library" in cname or "mentoring" in cname:
-                cell.fill = PatternFill(start_color="D9FFD9", end_color="D9FFD9", fill_type="solid")
-            else:
-                cell.fill = PatternFill(start_color="E6F3FF", end_color="E6F3FF", fill_type="solid")
-
-        # Footer (Section Incharge)
-        if section_incharge:
-            footer_row = row_offset + slots_per_day + 2
-            merge_range = f"A{footer_row}:{chr(65 + len(days))} {footer_row}"
-            if not any(merge_range == str(mr) for mr in ws.merged_cells.ranges):
-                ws.merge_cells(start_row=footer_row, end_row=footer_row,
-                               start_column=1, end_column=len(days)+1)
-            ws.cell(row=footer_row, column=1,
-                    value=f"Section Incharge: {section_incharge}").font = Font(bold=True)
-
-        # Adjust column width
-        for col in ws.columns:
-            max_len = 0
-            col_letter = None
-            for cell in col:
-                if isinstance(cell, MergedCell): continue
-                col_letter = cell.column_letter
-                if cell.value:
-                    max_len = max(max_len, len(str(cell.value)))
-            if col_letter:
-                ws.column_dimensions[col_letter].width = max_len + 4
-
-    # Create Index Sheet
-    ws_index = wb.active
-    ws_index.title = "Index"
-    ws_index.cell(row=1, column=1, value="TIMETABLE INDEX - SREENIDHI INSTITUTE").font = Font(bold=True, size=16)
-    ws_index.cell(row=1, column=1).alignment = Alignment(horizontal="center")
-    # Check if cells are already merged before merging
-    merge_range = f"A1:C1"
-    if not any(merge_range == str(mr) for mr in ws_index.merged_cells.ranges):
-        ws_index.merge_cells(start_row=1, end_row=1, start_column=1, end_column=3)
-
-    ws_index.cell(row=3, column=1, value="SECTION").font = Font(bold=True)
-    ws_index.cell(row=3, column=2, value="SHEET NAME").font = Font(bold=True)
-    ws_index.cell(row=3, column=3, value="DESCRIPTION").font = Font(bold=True)
-
-    row_idx = 4
-
-    # Master Timetable Section
-    ws_index.cell(row=row_idx, column=1, value="📊 MASTER TIMETABLE").font = Font(bold=True, color="FF0000")
-    ws_index.cell(row=row_idx, column=2, value="Master")
-    ws_index.cell(row=row_idx, column=3, value="Complete timetable overview")
-    row_idx += 1
-
-    # Group-Based Timetables Section
-    ws_index.cell(row=row_idx, column=1, value="👥 GROUP-BASED TIMETABLES").font = Font(bold=True, color="0000FF")
-    row_idx += 1
-
-    groups_in_schedule = {info["meta"]["group"] for info in schedule.values()}
-    for g in sorted(groups_in_schedule):
-        ws_index.cell(row=row_idx, column=2, value=f"Group_{g}")
-        ws_index.cell(row=row_idx, column=3, value=f"Timetable for Group {g}")
-        row_idx += 1
-
-    # Faculty-Based Timetables Section
-    ws_index.cell(row=row_idx, column=1, value="👨‍🏫 FACULTY-BASED TIMETABLES").font = Font(bold=True, color="008000")
-    row_idx += 1
-
-    faculties_in_schedule = {info["meta"]["faculty"] for info in schedule.values()}
-    for f in sorted(faculties_in_schedule):
-        ws_index.cell(row=row_idx, column=2, value=f"Faculty_{f}")
-        ws_index.cell(row=row_idx, column=3, value=f"Timetable for {f}")
-        row_idx += 1
-
-    # Room-Based Timetables Section
-    ws_index.cell(row=row_idx, column=1, value="🏫 ROOM-BASED TIMETABLES").font = Font(bold=True, color="800080")
-    row_idx += 1
-
-    rooms_in_schedule = {info["room"] for info in schedule.values()}
-    for r in sorted(rooms_in_schedule):
-        ws_index.cell(row=row_idx, column=2, value=f"Room_{r}")
-        ws_index.cell(row=row_idx, column=3, value=f"Room {r} utilization")
-        row_idx += 1
-
-    # Analysis Section
-    ws_index.cell(row=row_idx, column=1, value="📈 ANALYSIS & STATISTICS").font = Font(bold=True, color="FFA500")
-    row_idx += 1
-    ws_index.cell(row=row_idx, column=2, value="Statistics")
-    ws_index.cell(row=row_idx, column=3, value="Timetable statistics and metrics")
-    row_idx += 1
-    ws_index.cell(row=row_idx, column=2, value="Clash_Analysis")
-    ws_index.cell(row=row_idx, column=3, value="Conflict analysis report")
-
-    # Adjust column widths for index
+                merges.append((r1, r2, c))
+
+        if skipped:
+            print(f"⚠️ {skipped} overlapping session(s) not shown on sheet '{title}'.")
+
+        footer_row = row_offset + slots_per_day + 2 if section_incharge else None
+        total_rows = footer_row or (row_offset + slots_per_day - 1)
+
+        # Column widths must be declared before the first append: the
+        # write-only serializer emits <cols> with the first row, so any
+        # later assignment is dropped. Every cell value is planned above,
+        # so the widths can be sized up-front.
+        col_widths = [_len_longest_line(c.value) for c in header_cells]
+        for cell in slot_cells:
+            col_widths[0] = max(col_widths[0], _len_longest_line(cell.value))
+        for row in grid:
+            for j, v in enumerate(row):
+                if v is not None:
+                    col_widths[j] = max(col_widths[j], _len_longest_line(v))
+        if footer_row:
+            col_widths[0] = max(col_widths[0],
+                                len(f"Section Incharge: {section_incharge}"))
+        for j, width in enumerate(col_widths):
+            ws.column_dimensions[col_letters[j]].width = width + 4
+
+        for r in range(1, total_rows + 1):
+            row_cells = [None] * n_cols
+            if r == 3:
+                row_cells = header_cells[:]
+            elif row_offset <= r < row_offset + slots_per_day:
+                row_cells[0] = slot_cells[r - row_offset]
+                for j, v in enumerate(grid[r - row_offset]):
+                    if v is not None:
+                        row_cells[j] = WriteOnlyCell(ws, value=v)
+            elif footer_row and r == footer_row:
+                cell = WriteOnlyCell(ws, value=f"Section Incharge: {section_incharge}")
+                cell.font = BOLD
+                row_cells[0] = cell
+
+            for j in range(n_cols):
+                cell = row_cells[j]
+                if cell is None:
+                    continue
+                fill = fills.get((r, j + 1))
+                if fill is not None:
+                    cell.alignment = WRAP_CENTER
+                    cell.fill = fill
+            ws.append(row_cells)
+
+        for r1, r2, c in merges:
+            col = col_letters[c - 1]
+            ws.merged_cells.ranges.add(f"{col}{r1}:{col}{r2}")
+        if footer_row:
+            ws.merged_cells.ranges.add(f"A{footer_row}:{col_letters[-1]}{footer_row}")
+
+    # ===== INDEX SHEET =====
     ws_index.column_dimensions['A'].width = 25
     ws_index.column_dimensions['B'].width = 20
     ws_index.column_dimensions['C'].width = 40
+    ws_index.merged_cells.ranges.add("A1:C1")
+
+    index_rows = [
+        [("TIMETABLE INDEX - SREENIDHI INSTITUTE", TITLE_BOLD, CENTER)],
+        [],
+        [("SECTION", BOLD), ("SHEET NAME", BOLD), ("DESCRIPTION", BOLD)],
+        [("📊 MASTER TIMETABLE", RED_BOLD), "Master", "Complete timetable overview"],
+        [("👥 GROUP-BASED TIMETABLES", BLUE_BOLD)],
+        *([None, f"Group_{g}", f"Timetable for Group {g}"] for g in sorted(by_group)),
+        [("👨‍🏫 FACULTY-BASED TIMETABLES", GREEN_BOLD)],
+        *([None, f"Faculty_{f}", f"Timetable for {f}"] for f in sorted(by_faculty)),
+        [("🏫 ROOM-BASED TIMETABLES", PURPLE_BOLD)],
+        *([None, f"Room_{r}", f"Room {r} utilization"] for r in sorted(by_room)),
+        [("📈 ANALYSIS & STATISTICS", ORANGE_BOLD)],
+        [None, "Statistics", "Timetable statistics and metrics"],
+        [None, "Clash_Analysis", "Conflict analysis report"],
+    ]
+    _write_rows(ws_index, index_rows)
 
     # ===== MASTER TIMETABLE =====
-    ws_master = wb.create_sheet(title="Master")
-    make_sheet(ws_master, schedule, "Master", subtitle=f"{semester_name} - Complete Timetable")
-
+    # Clash mask for the master sheet: one vectorized pass over the room
+    # occupancy matrix marks every (day, slot) where some room is
+    # double-booked; the write pass ORs a red fill into those cells.
+    clash_mask = None
     if room_matrix is not None:
-        highlight_clashes(ws_master, room_matrix)
+        hot = (np.asarray(room_matrix) > 1).any(axis=0)
+        if hot.size == len(days) * slots_per_day:
+            clash_mask = hot.reshape(len(days), slots_per_day)
+    elif sids:
+        # No occupancy matrix supplied: rebuild it from the schedule
+        # arrays — a bincount over (room, slot) keys marks every slot
+        # where some room is double-booked.
+        assigned = np.array([r is not None for r in rooms_arr.tolist()])
+        if assigned.any():
+            total = len(days) * slots_per_day
+            _, room_inv = np.unique(rooms_arr[assigned], return_inverse=True)
+            room_exp, slot_exp, _ = _expand(room_inv, starts[assigned],
+                                            lengths[assigned])
+            counts = np.bincount(room_exp * total + slot_exp,
+                                 minlength=(int(room_inv.max()) + 1) * total)
+            clash_mask = (counts.reshape(-1, total) > 1).any(axis=0) \
+                .reshape(len(days), slots_per_day)
+
+    ws_master = wb.create_sheet(title="Master")
+    make_sheet(ws_master, sorted_sids, "Master", subtitle=f"{semester_name} - Complete Timetable",
+               clash_mask=clash_mask)
 
     # ===== GROUP-BASED TIMETABLES =====
-    groups_in_schedule = {info["meta"]["group"] for info in schedule.values()}
-    for g in sorted(groups_in_schedule):
+    for g in sorted(by_group):
         ws = wb.create_sheet(title=f"Group_{g}")
-        subset = {sid: info for sid, info in schedule.items() if info["meta"]["group"] == g}
-        make_sheet(ws, subset, f"Group {g}", subtitle=f"{semester_name} - Group {g} Timetable")
+        make_sheet(ws, by_group[g], f"Group {g}", subtitle=f"{semester_name} - Group {g} Timetable")
 
     # ===== FACULTY-BASED TIMETABLES =====
-    faculties_in_schedule = {info["meta"]["faculty"] for info in schedule.values()}
-    for f in sorted(faculties_in_schedule):
+    for f in sorted(by_faculty):
         ws = wb.create_sheet(title=f"Faculty_{f}")
-        subset = {sid: info for sid, info in schedule.items() if info["meta"]["faculty"] == f}
-        make_sheet(ws, subset, f"Faculty {f}", subtitle=f"{semester_name} - {f} Schedule")
+        make_sheet(ws, by_faculty[f], f"Faculty {f}", subtitle=f"{semester_name} - {f} Schedule")
 
     # ===== ROOM-BASED TIMETABLES =====
-    rooms_in_schedule = {info["room"] for info in schedule.values()}
-    for r in sorted(rooms_in_schedule):
+    for r in sorted(by_room):
         ws = wb.create_sheet(title=f"Room_{r}")
-        subset = {sid: info for sid, info in schedule.items() if info["room"] == r}
-        make_sheet(ws, subset, f"Room {r}", subtitle=f"{semester_name} - Room {r} Utilization")
+        make_sheet(ws, by_room[r], f"Room {r}", subtitle=f"{semester_name} - Room {r} Utilization")
 
     # ===== STATISTICS SHEET =====
     ws_stats = wb.create_sheet(title="Statistics")
-    ws_stats.cell(row=1, column=1, value="TIMETABLE STATISTICS").font = Font(bold=True, size=16)
-    ws_stats.cell(row=1, column=1).alignment = Alignment(horizontal="center")
-    # Check if cells are already merged before merging
-    merge_range = "A1:D1"
-    if not any(merge_range == str(mr) for mr in ws_stats.merged_cells.ranges):
-        ws_stats.merge_cells(start_row=1, end_row=1, start_column=1, end_column=4)
-
-    # Basic Statistics
-    ws_stats.cell(row=3, column=1, value="📊 BASIC STATISTICS").font = Font(bold=True, size=14)
-    ws_stats.cell(row=4, column=1, value="Total Sessions:")
-    ws_stats.cell(row=4, column=2, value=len(schedule))
-    ws_stats.cell(row=5, column=1, value="Total Groups:")
-    ws_stats.cell(row=5, column=2, value=len(groups_in_schedule))
-    ws_stats.cell(row=6, column=1, value="Total Faculty:")
-    ws_stats.cell(row=6, column=2, value=len(faculties_in_schedule))
-    ws_stats.cell(row=7, column=1, value="Total Rooms Used:")
-    ws_stats.cell(row=7, column=2, value=len(rooms_in_schedule))
-
-    # Session Distribution by Group
-    ws_stats.cell(row=9, column=1, value="👥 SESSIONS BY GROUP").font = Font(bold=True, size=14)
-    ws_stats.cell(row=10, column=1, value="Group").font = Font(bold=True)
-    ws_stats.cell(row=10, column=2, value="Sessions").font = Font(bold=True)
-    row = 11
-    for g in sorted(groups_in_schedule):
-        count = sum(1 for info in schedule.values() if info["meta"]["group"] == g)
-        ws_stats.cell(row=row, column=1, value=g)
-        ws_stats.cell(row=row, column=2, value=count)
-        row += 1
-
-    # Session Distribution by Faculty
-    ws_stats.cell(row=row+1, column=1, value="👨‍🏫 SESSIONS BY FACULTY").font = Font(bold=True, size=14)
-    ws_stats.cell(row=row+2, column=1, value="Faculty").font = Font(bold=True)
-    ws_stats.cell(row=row+2, column=2, value="Sessions").font = Font(bold=True)
-    row += 3
-    for f in sorted(faculties_in_schedule):
-        count = sum(1 for info in schedule.values() if info["meta"]["faculty"] == f)
-        ws_stats.cell(row=row, column=1, value=f)
-        ws_stats.cell(row=row, column=2, value=count)
-        row += 1
-
-    # Adjust column widths for stats
     ws_stats.column_dimensions['A'].width = 25
     ws_stats.column_dimensions['B'].width = 15
+    ws_stats.merged_cells.ranges.add("A1:D1")
+
+    stats_rows = [
+        [("TIMETABLE STATISTICS", TITLE_BOLD, CENTER)],
+        [],
+        [("📊 BASIC STATISTICS", HEADER_BOLD)],
+        ["Total Sessions:", len(schedule)],
+        ["Total Groups:", len(by_group)],
+        ["Total Faculty:", len(by_faculty)],
+        ["Total Rooms Used:", len(by_room)],
+        [],
+        [("👥 SESSIONS BY GROUP", HEADER_BOLD)],
+        [("Group", BOLD), ("Sessions", BOLD)],
+        *([g, len(by_group[g])] for g in sorted(by_group)),
+        [],
+        [("👨‍🏫 SESSIONS BY FACULTY", HEADER_BOLD)],
+        [("Faculty", BOLD), ("Sessions", BOLD)],
+        *([f, len(by_faculty[f])] for f in sorted(by_faculty)),
+    ]
+    _write_rows(ws_stats, stats_rows)
 
     # ===== CLASH ANALYSIS =====
     if clashes:
         ws_clash = wb.create_sheet(title="Clash_Analysis")
-        ws_clash.cell(row=1, column=1, value="CLASH ANALYSIS REPORT").font = Font(bold=True, size=16)
-        ws_clash.cell(row=1, column=1).alignment = Alignment(horizontal="center")
-        # Check if cells are already merged before merging
-        merge_range = "A1:C1"
-        if not any(merge_range == str(mr) for mr in ws_clash.merged_cells.ranges):
-            ws_clash.merge_cells(start_row=1, end_row=1, start_column=1, end_column=3)
-
-        row = 3
+        ws_clash.column_dimensions['A'].width = 60
+        ws_clash.merged_cells.ranges.add("A1:C1")
+
+        clash_rows = [[("CLASH ANALYSIS REPORT", TITLE_BOLD, CENTER)], []]
         total_clashes = 0
         for clash_type, clash_list in clashes.items():
             if clash_list:
-                ws_clash.cell(row=row, column=1, value=f"{clash_type.upper()} CLASHES:").font = Font(bold=True, color="FF0000")
-                row += 1
+                clash_rows.append([(f"{clash_type.upper()} CLASHES:", RED_BOLD)])
                 for item in clash_list:
-                    ws_clash.cell(row=row, column=1, value=f"• {str(item)}")
-                    row += 1
+                    clash_rows.append([f"• {str(item)}"])
                     total_clashes += 1
             else:
-                ws_clash.cell(row=row, column=1, value=f"✅ No {clash_type} clashes detected.").font = Font(color="008000")
-                row += 1
-            row += 1
+                clash_rows.append([(f"✅ No {clash_type} clashes detected.", GREEN)])
+            clash_rows.append([])
+
+        summary_font = SUMMARY_GREEN_BOLD if total_clashes == 0 else HEADER_BOLD
+        clash_rows.append([(f"TOTAL CLASHES FOUND: {total_clashes}", summary_font)])
+        _write_rows(ws_clash, clash_rows)
+
+    return wb
+
+
+def _save(wb, target):
+    """wb.save with a fast deflate level.
+
+    Zipping the package at zipfile's default level is a large share of
+    export time; level 1 compresses XML nearly as well and is much
+    faster. openpyxl hardwires the default, so the archive is built
+    here the same way its own save_workbook does.
+    """
+    archive = ZipFile(target, "w", ZIP_DEFLATED, allowZip64=True, compresslevel=1)
+    wb.properties.modified = datetime.datetime.now(
+        tz=datetime.timezone.utc).replace(tzinfo=None)
+    ExcelWriter(wb, archive).save()
+
+
+def save_workbook(wb, target):
+    """Save a workbook to a path or any writable file-like object.
+
+    A file-like (anything with ``.write``) gets the bytes streamed to it
+    directly, so web handlers can pipe the workbook to a client without
+    materializing an .xlsx on disk.
+    """
+    if hasattr(target, "write"):
+        _save(wb, target)
+        return
+
+    # Bounded retry: a locked target (file open in Excel) re-runs only
+    # the save, never the whole workbook build, and there is no
+    # interactive prompt so batch/server callers cannot hang.
+    for attempt in range(3):
+        try:
+            _save(wb, target)
+            break
+        except PermissionError as e:
+            print(f"❌ Save attempt {attempt + 1} failed: {e}")
+            time.sleep(1)
+    else:
+        raise RuntimeError(f"Could not save {target}")
 
-        # Summary
-        ws_clash.cell(row=row, column=1, value=f"TOTAL CLASHES FOUND: {total_clashes}").font = Font(bold=True, size=14)
-        if total_clashes == 0:
-            ws_clash.cell(row=row, column=1).font = Font(bold=True, size=14, color="008000")
 
-        ws_clash.column_dimensions['A'].width = 60
-    try:
-        wb.save(filename)
-        print(f"✅ Timetable exported to {filename}")
-    except Exception as e:
-        print(f"❌ Failed to export timetable: {e}")
-        input("Press Enter to continue...")
-        export_schedule_to_excel(schedule, days, slots_per_day, filename, time_labels, semester_name, clashes, groups, faculties, room_matrix, section, dept, room_no, ay, section_incharge)
+def export_schedule_to_excel(schedule, days, slots_per_day, filename="timetable.xlsx",
+                             time_labels=None, semester_name="Semester II",
+                             clashes=None, groups=None, faculties=None,
+                             room_matrix=None, section="A", dept="CSE-AI & ML",
+                             room_no="8202", ay="2025-26", section_incharge=None):
+    wb = build_workbook(schedule, days, slots_per_day,
+                        time_labels=time_labels, semester_name=semester_name,
+                        clashes=clashes, groups=groups, faculties=faculties,
+                        room_matrix=room_matrix, section=section, dept=dept,
+                        room_no=room_no, ay=ay, section_incharge=section_incharge)
+    save_workbook(wb, filename)
+    print(f"✅ Timetable exported to {filename}")
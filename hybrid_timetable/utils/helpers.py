@@ -1,44 +1,95 @@
+import re
 from collections import defaultdict
+from dataclasses import dataclass, fields, asdict
+
+# Display categories, resolved once per course instead of per rendered
+# cell: 0 = lab, 1 = activity (sports/library/mentoring), 2 = normal.
+# "lab" wins over activity keywords, matching the old substring checks.
+_LAB_RE = re.compile(r"lab", re.I)
+_ACTIVITY_RE = re.compile(r"sports|library|mentoring", re.I)
+
+
+def categorize_name(name):
+    if _LAB_RE.search(name):
+        return 0
+    if _ACTIVITY_RE.search(name):
+        return 1
+    return 2
+
+
+@dataclass(slots=True)
+class Session:
+    """Slotted session record with dict-style access for legacy callers.
+
+    Attribute access is a fixed-offset load instead of a dict hash+probe,
+    which matters in the GA hot path; the mapping helpers keep existing
+    ``s['group']`` / ``s.get(...)`` call sites working unchanged.
+    """
+    sess_id: str
+    course_id: str
+    name: str
+    faculty: str
+    group: str
+    length: int
+    category: int = 2
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return [f.name for f in fields(self)]
+
+    def as_dict(self):
+        return asdict(self)
+
 
 def absolute_slot(day_idx, pos, slots_per_day):
     return day_idx * slots_per_day + pos
 
 def build_weekly_block_indices(days, slots_per_day, positions):
-    indices = []
-    for d in range(len(days)):
-        for p in positions:
-            indices.append(absolute_slot(d, p, slots_per_day))
-    return indices
+    # Inline absolute_slot: one comprehension, no per-slot function call.
+    return [d * slots_per_day + p
+            for d in range(len(days)) for p in positions]
 
 def expand_courses(courses):
+    """Expand course definitions into per-occurrence Session records."""
     sessions = []
     for c in courses:
         groups = c["group"] if isinstance(c["group"], list) else [c["group"]]
         n = c["weekly_slots"]
         k = c["consecutive"]
+        cat = categorize_name(c["name"])
 
         for g in groups:
             if k == 1:
                 for i in range(n):
-                    sessions.append({
-                        "sess_id": f"{c['id']}_{g}_s{i}",
-                        "course_id": c["id"],
-                        "name": c["name"],
-                        "faculty": c["faculty"],
-                        "group": g,
-                        "length": 1
-                    })
+                    sessions.append(Session(
+                        sess_id=f"{c['id']}_{g}_s{i}",
+                        course_id=c["id"],
+                        name=c["name"],
+                        faculty=c["faculty"],
+                        group=g,
+                        length=1,
+                        category=cat,
+                    ))
             else:
                 if n % k != 0:
                     raise ValueError("weekly_slots must be divisible by consecutive length.")
                 cnt = n // k
                 for i in range(cnt):
-                    sessions.append({
-                        "sess_id": f"{c['id']}_{g}_lab{i}",
-                        "course_id": c["id"],
-                        "name": c["name"],
-                        "faculty": c["faculty"],
-                        "group": g,
-                        "length": k
-                    })
+                    sessions.append(Session(
+                        sess_id=f"{c['id']}_{g}_lab{i}",
+                        course_id=c["id"],
+                        name=c["name"],
+                        faculty=c["faculty"],
+                        group=g,
+                        length=k,
+                        category=cat,
+                    ))
     return sessions